@@ -11,10 +11,66 @@ class Settings(BaseSettings):
     DB_USER: str = os.getenv("DB_USER", "remoto")
     DB_PASS: str = os.getenv("DB_PASS", "tu_password_segura")
     DB_NAME: str = os.getenv("DB_NAME", "integrador")
+
+    # Pools por clase de consulta y réplicas de lectura ("host1:3306,host2")
+    DB_INTERACTIVE_POOL_SIZE: int = int(os.getenv("DB_INTERACTIVE_POOL_SIZE", "4"))
+    # Mayor que PRECOMPUTE_CONCURRENCY: el precálculo no acapara el pool analítico
+    DB_ANALYTICAL_POOL_SIZE: int = int(os.getenv("DB_ANALYTICAL_POOL_SIZE", "4"))
+    # Segundos que se espera una conexión libre antes de responder 503
+    DB_POOL_WAIT_TIMEOUT: float = float(os.getenv("DB_POOL_WAIT_TIMEOUT", "5"))
+    DB_REPLICA_HOSTS: str = os.getenv("DB_REPLICA_HOSTS", "")
+    DB_REPLICA_CHECK_INTERVAL: float = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "10"))
+    DB_REPLICA_MAX_LAG_INTERACTIVE: float = float(os.getenv("DB_REPLICA_MAX_LAG_INTERACTIVE", "5"))
+    DB_REPLICA_MAX_LAG_ANALYTICAL: float = float(os.getenv("DB_REPLICA_MAX_LAG_ANALYTICAL", "300"))
+
+    # Resiliencia de la base de datos
+    DB_CONNECT_TIMEOUT: int = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+    DB_QUERY_TIMEOUT_MS: int = int(os.getenv("DB_QUERY_TIMEOUT_MS", "10000"))
+    DB_ANALYTICAL_QUERY_TIMEOUT_MS: int = int(os.getenv("DB_ANALYTICAL_QUERY_TIMEOUT_MS", "60000"))
+    # Segundos extra del timeout de socket del cliente sobre MAX_EXECUTION_TIME
+    DB_CLIENT_TIMEOUT_MARGIN: int = int(os.getenv("DB_CLIENT_TIMEOUT_MARGIN", "5"))
+    DB_BREAKER_FAILURES: int = int(os.getenv("DB_BREAKER_FAILURES", "3"))
+    DB_BREAKER_RESET_TIMEOUT: float = float(os.getenv("DB_BREAKER_RESET_TIMEOUT", "30"))
+    STALE_MAX_AGE: float = float(os.getenv("STALE_MAX_AGE", "3600"))
+
+    # Validación condicional (ETag) y long-polling
+    LATEST_READING_TTL: float = float(os.getenv("LATEST_READING_TTL", "1.0"))
+    # Rutas con ventana relativa (NOW() - INTERVAL): el ETag cambia cada tantos segundos
+    ETAG_WINDOW_SECONDS: int = int(os.getenv("ETAG_WINDOW_SECONDS", "60"))
+    LONG_POLL_TIMEOUT: float = float(os.getenv("LONG_POLL_TIMEOUT", "30"))
+    LONG_POLL_INTERVAL: float = float(os.getenv("LONG_POLL_INTERVAL", "1.0"))
+
+    # Logging: nivel, formato (text|json) y muestreo por logger ("app.database=0.1")
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text")
+    LOG_SAMPLING: str = os.getenv("LOG_SAMPLING", "")
+
+    # Paginación del histórico
+    HISTORY_PAGE_SIZE: int = int(os.getenv("HISTORY_PAGE_SIZE", "500"))
+    HISTORY_MAX_PAGE_SIZE: int = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "5000"))
+
+    # Compresión de respuestas (bytes mínimos para comprimir)
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+    # Reglas de negocio y motor de alertas (reglas en un JSON opcional)
+    HUMIDITY_HIGH_THRESHOLD: float = float(os.getenv("HUMIDITY_HIGH_THRESHOLD", "80"))
+    ALERT_RULES_FILE: str = os.getenv("ALERT_RULES_FILE", "")
+    ALERT_POLL_INTERVAL: float = float(os.getenv("ALERT_POLL_INTERVAL", "5"))
+    ALERT_BATCH_SIZE: int = int(os.getenv("ALERT_BATCH_SIZE", "5000"))
+    ALERT_HISTORY_SIZE: int = int(os.getenv("ALERT_HISTORY_SIZE", "200"))
+
+    # Precálculo de análisis en segundo plano (0 en PRECOMPUTE_INTERVAL lo desactiva)
+    PRECOMPUTE_INTERVAL: float = float(os.getenv("PRECOMPUTE_INTERVAL", "60"))
+    PRECOMPUTE_MIN_INTERVAL: float = float(os.getenv("PRECOMPUTE_MIN_INTERVAL", "5"))
+    PRECOMPUTE_CHECK_INTERVAL: float = float(os.getenv("PRECOMPUTE_CHECK_INTERVAL", "2"))
+    PRECOMPUTE_JITTER: float = float(os.getenv("PRECOMPUTE_JITTER", "0.1"))
+    PRECOMPUTE_CONCURRENCY: int = int(os.getenv("PRECOMPUTE_CONCURRENCY", "2"))
+    PRECOMPUTE_RETRY_DELAY: float = float(os.getenv("PRECOMPUTE_RETRY_DELAY", "30"))
+    SNAPSHOT_MAX_AGE: float = float(os.getenv("SNAPSHOT_MAX_AGE", "300"))
     
     class Config:
         env_file = ".env"
 
 settings = Settings()
 logger.info("✅ Configuración cargada correctamente")
-logger.info(f"Conectando a DB: {settings.DB_USER}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}")
\ No newline at end of file
+logger.info("Conectando a DB: %s@%s:%s/%s", settings.DB_USER, settings.DB_HOST, settings.DB_PORT, settings.DB_NAME)
\ No newline at end of file
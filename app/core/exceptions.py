@@ -7,11 +7,27 @@ class AppException(Exception):
 class DatabaseConnectionError(AppException):
     """Error de conexión a la base de datos"""
 
+class DatabaseUnavailableError(DatabaseConnectionError):
+    """Base de datos marcada como caída por el circuit breaker"""
+
+    def __init__(self, message: str = "", retry_after: int = 0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 class SensorDataNotFoundError(AppException):
     """Datos de sensor no encontrados"""
 
+class InvalidParameterError(AppException):
+    """Parámetros de consulta inválidos"""
+
 def handle_app_exception(exc: AppException):
-    if isinstance(exc, DatabaseConnectionError):
+    if isinstance(exc, DatabaseUnavailableError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Base de datos no disponible temporalmente",
+            headers={"Retry-After": str(exc.retry_after or 1)}
+        )
+    elif isinstance(exc, DatabaseConnectionError):
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Error de conexión con la base de datos"
@@ -21,6 +37,11 @@ def handle_app_exception(exc: AppException):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Datos de sensor no encontrados"
         )
+    elif isinstance(exc, InvalidParameterError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc) or "Parámetros inválidos"
+        )
     else:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
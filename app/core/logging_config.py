@@ -0,0 +1,119 @@
+#fastapi/app/core/logging_config.py
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from app.core.config import settings
+
+# Id de la solicitud en curso; lo fija RequestIdMiddleware
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Adjunta el request id al registro en el hilo que hace el log"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get() or "-"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deja pasar solo una fracción de los registros por debajo de WARNING para
+    los loggers configurados (por prefijo). Advertencias y errores siempre pasan.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        # Prefijos más largos primero para que gane la regla más específica
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return rate >= 1 or random.random() < rate
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo de la solicitud: el mensaje
+    (msg % args) y el formato final se resuelven en el hilo del listener.
+    La cola es en proceso, así que no hace falta volver el registro picklable.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def parse_sampling(spec: str) -> dict:
+    """'app.database=0.1,app.services=0.5' -> {'app.database': 0.1, 'app.services': 0.5}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+def setup_logging():
+    """
+    Configura el logging raíz: los registros se encolan sin formatear y un
+    QueueListener los escribe desde un hilo aparte, en texto o JSON.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    if settings.LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(SamplingFilter(parse_sampling(settings.LOG_SAMPLING)))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Vacía la cola y detiene el hilo escritor"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,144 @@
+#fastapi/app/core/middleware.py
+import gzip
+import uuid
+from starlette.datastructures import Headers, MutableHeaders
+from app.core.logging_config import request_id_var
+import logging
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = ("application/json", "application/msgpack", "text/")
+
+
+def _accepted_encodings(accept_encoding: str) -> dict:
+    """Parsea Accept-Encoding en {codificación: q}"""
+    encodings = {}
+    for item in accept_encoding.split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if name:
+            encodings[name.lower()] = q
+    return encodings
+
+
+class CompressionMiddleware:
+    """
+    Comprime respuestas con brotli o gzip según Accept-Encoding cuando el
+    cuerpo supera `minimum_size` bytes. Las respuestas en streaming, las
+    ya codificadas y los tipos no comprimibles se envían sin cambios.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _select_encoding(self, accept_encoding: str):
+        accepted = _accepted_encodings(accept_encoding)
+        if brotli is not None and accepted.get("br", 0) > 0:
+            return "br"
+        if accepted.get("gzip", 0) > 0:
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, streaming
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or streaming:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+
+            if message.get("more_body", False):
+                # Respuesta en streaming: se deja pasar sin comprimir
+                streaming = True
+                await send(start_message)
+                await send(message)
+                return
+
+            content_type = headers.get("content-type", "")
+            if (
+                len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or start_message["status"] in (204, 304)
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = self._compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            logger.debug("Respuesta comprimida con %s: %d -> %d bytes", encoding, len(body), len(compressed))
+
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class RequestIdMiddleware:
+    """
+    Asigna un id a cada solicitud (o reutiliza X-Request-ID del cliente),
+    lo expone a los logs vía contextvar y lo devuelve en la respuesta.
+    """
+
+    def __init__(self, app, header_name: str = "X-Request-ID"):
+        self.app = app
+        self.header_name = header_name
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get(self.header_name) or uuid.uuid4().hex
+        token = request_id_var.set(request_id[:64])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[self.header_name] = request_id_var.get()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -1,39 +1,362 @@
 #fastapi/app/database/connection.py
+import contextvars
+import itertools
+import math
+import threading
+import time
 import mysql.connector
-from mysql.connector import pooling
+from mysql.connector import errors, pooling
+from contextlib import contextmanager
 from app.core.config import settings
-from app.core.exceptions import DatabaseConnectionError
+from app.core.exceptions import DatabaseConnectionError, DatabaseUnavailableError
+from app.database.resilience import CircuitBreaker
 import logging
 
 logger = logging.getLogger(__name__)
 
+# ER_QUERY_TIMEOUT: la consulta superó MAX_EXECUTION_TIME
+QUERY_TIMEOUT_ERRNO = 3024
+
+# Timeouts de socket del cliente (read_timeout/write_timeout). El conector
+# deja connection_timeout en None tras el handshake, así que sin ellos un
+# servidor que deja de responder bloquea la lectura indefinidamente.
+# Versiones anteriores del conector no tienen estas opciones.
+CLIENT_TIMEOUTS_SUPPORTED = "read_timeout" in mysql.connector.constants.DEFAULT_CONFIGURATION
+CLIENT_TIMEOUT_ERRORS = tuple(
+    getattr(errors, name) for name in ("ReadTimeoutError", "WriteTimeoutError") if hasattr(errors, name)
+)
+# Errores que indican un servidor que no responde: cuentan como fallo del nodo
+CONNECTIVITY_ERRORS = (errors.OperationalError, errors.InterfaceError, *CLIENT_TIMEOUT_ERRORS)
+
+# Clases de consulta: cada una tiene su propio pool por servidor para que los
+# escaneos largos no acaparen las conexiones de las consultas interactivas
+INTERACTIVE = "interactive"
+ANALYTICAL = "analytical"
+
+# Nodo fijado por DatabaseConnection.pinned() para el contexto en curso
+_pinned_node = contextvars.ContextVar("pinned_node", default=None)
+
+QUERY_CLASSES = {
+    INTERACTIVE: {
+        "pool_size": settings.DB_INTERACTIVE_POOL_SIZE,
+        "timeout_ms": settings.DB_QUERY_TIMEOUT_MS,
+        "max_lag": settings.DB_REPLICA_MAX_LAG_INTERACTIVE,
+    },
+    ANALYTICAL: {
+        "pool_size": settings.DB_ANALYTICAL_POOL_SIZE,
+        "timeout_ms": settings.DB_ANALYTICAL_QUERY_TIMEOUT_MS,
+        "max_lag": settings.DB_REPLICA_MAX_LAG_ANALYTICAL,
+    },
+}
+
+
+class _PooledConnection:
+    """Conexión del pool que devuelve su plaza en el semáforo del nodo al cerrarse"""
+
+    def __init__(self, conn, slots):
+        self._conn = conn
+        self._slots = slots
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        try:
+            self._conn.close()
+        finally:
+            if not self._released:
+                self._released = True
+                self._slots.release()
+
+
+class DatabaseNode:
+    """Un servidor MySQL (primario o réplica) con un pool por clase de consulta"""
+
+    def __init__(self, name: str, host: str, port: int, replica: bool = False):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.replica = replica
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold=settings.DB_BREAKER_FAILURES,
+            reset_timeout=settings.DB_BREAKER_RESET_TIMEOUT
+        )
+        self._pools = {}
+        self._pool_lock = threading.Lock()
+        # MySQLConnectionPool falla de inmediato si no hay conexiones libres:
+        # el semáforo deja esperar una plaza hasta DB_POOL_WAIT_TIMEOUT
+        self._slots = {
+            query_class: threading.BoundedSemaphore(config["pool_size"])
+            for query_class, config in QUERY_CLASSES.items()
+        }
+        self.lag = None
+        self._lag_checked_at = None
+
+    def get_pool(self, query_class: str):
+        pool = self._pools.get(query_class)
+        if pool is not None:
+            return pool
+        with self._pool_lock:
+            if query_class not in self._pools:
+                config = QUERY_CLASSES[query_class]
+                options = {}
+                if CLIENT_TIMEOUTS_SUPPORTED:
+                    # Por encima de MAX_EXECUTION_TIME: una consulta pesada la
+                    # corta el servidor (3024); el cliente solo corta si el
+                    # servidor dejó de responder
+                    client_timeout = math.ceil(config["timeout_ms"] / 1000) + settings.DB_CLIENT_TIMEOUT_MARGIN
+                    options = {"read_timeout": client_timeout, "write_timeout": client_timeout}
+                try:
+                    self._pools[query_class] = pooling.MySQLConnectionPool(
+                        pool_name=f"{self.name}_{query_class}",
+                        pool_size=config["pool_size"],
+                        # La sesión no se reinicia al devolver la conexión para
+                        # conservar el MAX_EXECUTION_TIME fijado por init_command
+                        pool_reset_session=False,
+                        host=self.host,
+                        port=self.port,
+                        user=settings.DB_USER,
+                        password=settings.DB_PASS,
+                        database=settings.DB_NAME,
+                        autocommit=True,
+                        connection_timeout=settings.DB_CONNECT_TIMEOUT,
+                        init_command=f"SET SESSION MAX_EXECUTION_TIME={int(config['timeout_ms'])}",
+                        **options
+                    )
+                    logger.info("✅ Conexión exitosa con la base de datos (%s, %s)", self.name, query_class)
+                except Exception as e:
+                    logger.error("❌ Error al conectar con la base de datos (%s): %s", self.name, e)
+                    raise DatabaseConnectionError(f"Error de conexión: {str(e)}")
+            return self._pools[query_class]
+
+    def acquire(self, query_class: str):
+        if not self.breaker.allow_request():
+            raise DatabaseUnavailableError(
+                f"Circuito abierto: {self.name} no disponible",
+                retry_after=self.breaker.retry_after()
+            )
+        slots = self._slots[query_class]
+        if not slots.acquire(timeout=settings.DB_POOL_WAIT_TIMEOUT):
+            # Pool agotado: es saturación, no una caída de la base de datos
+            self.breaker.release()
+            raise DatabaseConnectionError(f"Pool {query_class} de {self.name} agotado")
+        try:
+            return _PooledConnection(self.get_pool(query_class).get_connection(), slots)
+        except errors.PoolError as e:
+            slots.release()
+            self.breaker.release()
+            raise DatabaseConnectionError(f"Error al obtener conexión: {str(e)}")
+        except Exception as e:
+            slots.release()
+            self.breaker.record_failure()
+            raise DatabaseConnectionError(f"Error al obtener conexión: {str(e)}")
+
+    def ping(self):
+        """Verifica que el nodo responde (con una conexión del pool interactivo)"""
+        conn = self.acquire(INTERACTIVE)
+        try:
+            conn.ping(reconnect=False)
+            self.breaker.record_success()
+        except CONNECTIVITY_ERRORS as e:
+            self.breaker.record_failure()
+            raise DatabaseConnectionError(f"Error de base de datos: {str(e)}")
+        finally:
+            conn.close()
+
+    def _check_lag(self):
+        """Segundos de retraso de la réplica; None si la replicación no corre"""
+        conn = self.acquire(INTERACTIVE)
+        try:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except errors.ProgrammingError:
+                # MySQL < 8.0.22
+                cursor.execute("SHOW SLAVE STATUS")
+            status = cursor.fetchone()
+            cursor.close()
+            self.breaker.record_success()
+        except CONNECTIVITY_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.release()
+            raise
+        finally:
+            conn.close()
+        if not status:
+            return None
+        lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+        return float(lag) if lag is not None else None
+
+    def refresh_lag(self):
+        """Revisa el retraso de la réplica; lo llama la tarea periódica, no las solicitudes"""
+        try:
+            self.lag = self._check_lag()
+        except Exception as e:
+            logger.warning("No se pudo revisar la réplica %s: %s", self.name, e)
+            self.lag = None
+        finally:
+            self._lag_checked_at = time.monotonic()
+
+    def is_usable(self, query_class: str) -> bool:
+        """
+        El primario siempre es candidato (su circuit breaker decide). Una
+        réplica lo es si su circuito no está abierto y su último retraso
+        conocido no supera el máximo de la clase de consulta. Si la revisión
+        periódica dejó de correr, el valor caduca y la réplica se descarta.
+        """
+        if self.breaker.state == CircuitBreaker.OPEN:
+            return False
+        if not self.replica:
+            return True
+        if self._lag_checked_at is None or time.monotonic() - self._lag_checked_at > 3 * settings.DB_REPLICA_CHECK_INTERVAL:
+            return False
+        return self.lag is not None and self.lag <= QUERY_CLASSES[query_class]["max_lag"]
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "host": self.host,
+            "replica": self.replica,
+            "circuit": self.breaker.state,
+            "lag_seconds": self.lag,
+        }
+
+
+def _parse_hosts(spec: str):
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        host, _, port = item.partition(":")
+        yield host, int(port) if port else settings.DB_PORT
+
+
 class DatabaseConnection:
-    _pool = None
+    primary = DatabaseNode("primary", settings.DB_HOST, settings.DB_PORT)
+    replicas = [
+        DatabaseNode(f"replica{i}", host, port, replica=True)
+        for i, (host, port) in enumerate(_parse_hosts(settings.DB_REPLICA_HOSTS), start=1)
+    ]
+    _round_robin = itertools.count()
+
+    # Circuito del primario
+    breaker = primary.breaker
 
     @classmethod
-    def get_pool(cls):
-        if cls._pool is None:
+    def nodes(cls):
+        return [cls.primary, *cls.replicas]
+
+    @classmethod
+    def check_replicas(cls):
+        for node in cls.replicas:
+            node.refresh_lag()
+
+    @classmethod
+    def _candidates(cls, query_class: str):
+        """Réplicas sanas (en round robin) y, como respaldo, el primario"""
+        healthy = [node for node in cls.replicas if node.is_usable(query_class)]
+        if healthy:
+            offset = next(cls._round_robin) % len(healthy)
+            healthy = healthy[offset:] + healthy[:offset]
+        return [*healthy, cls.primary]
+
+    @classmethod
+    @contextmanager
+    def pinned(cls, query_class: str = INTERACTIVE):
+        """
+        Envía todas las consultas del bloque (de cualquier clase) al mismo
+        nodo, elegido con la tolerancia de retraso de `query_class`, para
+        que una versión de datos y los datos leídos después sean coherentes.
+        """
+        node = _pinned_node.get()
+        if node is not None:
+            yield node
+            return
+        node = cls._candidates(query_class)[0]
+        token = _pinned_node.set(node)
+        try:
+            yield node
+        finally:
+            _pinned_node.reset(token)
+
+    @classmethod
+    def _acquire(cls, query_class: str = INTERACTIVE, primary: bool = False):
+        if query_class not in QUERY_CLASSES:
+            raise ValueError(f"Clase de consulta desconocida: {query_class}")
+
+        pinned = _pinned_node.get()
+        if pinned is not None:
+            candidates = [pinned]
+        elif primary:
+            candidates = [cls.primary]
+        else:
+            candidates = cls._candidates(query_class)
+
+        error = None
+        for node in candidates:
             try:
-                cls._pool = pooling.MySQLConnectionPool(
-                    pool_name="auth_pool",
-                    pool_size=5,
-                    host=settings.DB_HOST,
-                    port=settings.DB_PORT,
-                    user=settings.DB_USER,
-                    password=settings.DB_PASS,
-                    database=settings.DB_NAME,
-                    autocommit=True
-                )
-                logger.info("✅ Conexión exitosa con la base de datos")
-            except Exception as e:
-                logger.error(f"❌ Error al conectar con la base de datos: {e}")
-                raise DatabaseConnectionError(f"Error de conexión: {str(e)}")
-        return cls._pool
-
-    @classmethod
-    def get_connection(cls):
-        pool = cls.get_pool()
+                return node, node.acquire(query_class)
+            except DatabaseConnectionError as e:
+                if node is not cls.primary:
+                    logger.warning("Réplica %s no disponible para %s: %s", node.name, query_class, e)
+                error = e
+        raise error
+
+    @classmethod
+    def get_pool(cls, query_class: str = INTERACTIVE):
+        return cls.primary.get_pool(query_class)
+
+    @classmethod
+    def get_connection(cls, query_class: str = INTERACTIVE):
+        node, conn = cls._acquire(query_class)
+        node.breaker.record_success()
+        return conn
+
+    @classmethod
+    @contextmanager
+    def cursor(cls, query_class: str = INTERACTIVE, dictionary: bool = True, primary: bool = False):
+        """
+        Entrega un cursor del pool de `query_class`, en una réplica sana si
+        la hay (o en el primario con `primary`, salvo que haya un nodo fijado
+        con pinned()), y devuelve la conexión al pool al terminar.
+        Los fallos de conectividad (incluido el timeout de socket del
+        cliente: el servidor no responde) alimentan el circuit breaker del
+        nodo; los timeouts de MAX_EXECUTION_TIME no. Todos se reportan como
+        DatabaseConnectionError.
+        """
+        node, conn = cls._acquire(query_class, primary)
+        breaker = node.breaker
+        cursor = None
         try:
-            return pool.get_connection()
-        except Exception as e:
-            raise DatabaseConnectionError(f"Error al obtener conexión: {str(e)}")
\ No newline at end of file
+            cursor = conn.cursor(dictionary=dictionary)
+            yield cursor
+        except CLIENT_TIMEOUT_ERRORS as e:
+            # El conector cierra la conexión; el pool la reconecta al reusarla
+            breaker.record_failure()
+            raise DatabaseConnectionError(f"Timeout de socket: {str(e)}")
+        except (errors.OperationalError, errors.InterfaceError) as e:
+            breaker.record_failure()
+            raise DatabaseConnectionError(f"Error de base de datos: {str(e)}")
+        except errors.DatabaseError as e:
+            # Un timeout (MAX_EXECUTION_TIME) indica una consulta pesada, no un
+            # servidor caído: como con el pool agotado, no cuenta como fallo
+            # para que los escaneos analíticos no abran el circuito de las
+            # consultas interactivas del mismo nodo
+            breaker.release()
+            if e.errno == QUERY_TIMEOUT_ERRNO:
+                raise DatabaseConnectionError(f"Timeout de consulta: {str(e)}")
+            raise
+        except Exception:
+            # Errores ajenos a la disponibilidad (p. ej. sin datos) no abren el circuito
+            breaker.record_success()
+            raise
+        else:
+            breaker.record_success()
+        finally:
+            try:
+                if cursor is not None and conn.is_connected():
+                    cursor.close()
+            finally:
+                # Siempre se devuelve al pool, aunque la conexión se haya roto
+                conn.close()
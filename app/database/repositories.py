@@ -1,213 +1,306 @@
 #fastapi/app/database/repositories.py
-from app.database.connection import DatabaseConnection
-from app.core.exceptions import SensorDataNotFoundError
+from app.database.connection import DatabaseConnection, INTERACTIVE, ANALYTICAL
+from app.core.exceptions import SensorDataNotFoundError, InvalidParameterError
 import mysql.connector
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columnas numéricas de sensor_readings que admiten análisis
+METRIC_COLUMNS = ("temperature", "humidity", "pressure")
+
 class SensorRepository:
     @staticmethod
     def get_last_sensor_readings():
-        conn = None
         try:
-            conn = DatabaseConnection.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            query = """
-            SELECT sr.*, s.type, s.name 
-            FROM sensor_readings sr
-            JOIN sensors s ON sr.sensor_id = s.id
-            WHERE sr.id IN (
-                SELECT MAX(id) 
-                FROM sensor_readings 
-                GROUP BY sensor_id
-            )
-            ORDER BY s.id
-            """
-            logger.debug(f"Ejecutando query: {query}")
-            cursor.execute(query)
-            result = cursor.fetchall()
+            with DatabaseConnection.cursor(INTERACTIVE) as cursor:
+                query = """
+                SELECT sr.*, s.type, s.name 
+                FROM sensor_readings sr
+                JOIN sensors s ON sr.sensor_id = s.id
+                WHERE sr.id IN (
+                    SELECT MAX(id) 
+                    FROM sensor_readings 
+                    GROUP BY sensor_id
+                )
+                ORDER BY s.id
+                """
+                logger.debug("Ejecutando query: %s", query)
+                cursor.execute(query)
+                result = cursor.fetchall()
             
-            if not result:
-                logger.warning("No se encontraron datos de sensores")
-                raise SensorDataNotFoundError()
+                if not result:
+                    logger.warning("No se encontraron datos de sensores")
+                    raise SensorDataNotFoundError()
                 
-            logger.info(f"Obtenidos {len(result)} registros de sensores")
-            for row in result:
-                logger.debug(f"Dato sensor: {row}")
+                logger.info("Obtenidos %s registros de sensores", len(result))
+                if logger.isEnabledFor(logging.DEBUG):
+                    for row in result:
+                        logger.debug("Dato sensor: %s", row)
                 
-            return result
+                return result
         except Exception as e:
-            logger.error(f"Error en get_last_sensor_readings: {str(e)}")
+            logger.error("Error en get_last_sensor_readings: %s", e)
+            raise
+
+    @staticmethod
+    def get_latest_reading_id():
+        """
+        Obtiene el id de la lectura más reciente (versión de los datos).
+        Se lee del primario para no tomar la versión de una réplica atrasada,
+        salvo dentro de DatabaseConnection.pinned(), donde sale del mismo
+        nodo que los datos.
+        """
+        try:
+            with DatabaseConnection.cursor(INTERACTIVE, dictionary=False, primary=True) as cursor:
+                cursor.execute("SELECT MAX(id) FROM sensor_readings")
+                row = cursor.fetchone()
+                return int(row[0]) if row and row[0] is not None else 0
+        except Exception as e:
+            logger.error("Error en get_latest_reading_id: %s", e)
             raise
-        finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
 
     @staticmethod
     def get_pressure_stats():
-        conn = None
         try:
-            conn = DatabaseConnection.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            query = """
-            SELECT pressure, recorded_at 
-            FROM sensor_readings 
-            WHERE sensor_id = 6
-            AND recorded_at >= NOW() - INTERVAL 7 DAY
-            AND pressure IS NOT NULL
-            ORDER BY recorded_at
-            """
-            logger.debug(f"Ejecutando query presión: {query}")
-            cursor.execute(query)
-            result = cursor.fetchall()
+            with DatabaseConnection.cursor(ANALYTICAL) as cursor:
+                query = """
+                SELECT pressure, recorded_at 
+                FROM sensor_readings 
+                WHERE sensor_id = 6
+                AND recorded_at >= NOW() - INTERVAL 7 DAY
+                AND pressure IS NOT NULL
+                ORDER BY recorded_at
+                """
+                logger.debug("Ejecutando query presión: %s", query)
+                cursor.execute(query)
+                result = cursor.fetchall()
             
-            if not result:
-                logger.warning("No se encontraron datos de presión")
-                raise SensorDataNotFoundError()
+                if not result:
+                    logger.warning("No se encontraron datos de presión")
+                    raise SensorDataNotFoundError()
                 
-            logger.info(f"Obtenidos {len(result)} registros de presión")
-            return {"pressure": [r['pressure'] for r in result], "data": result}
+                logger.info("Obtenidos %s registros de presión", len(result))
+                return {"pressure": [r['pressure'] for r in result], "data": result}
         except Exception as e:
-            logger.error(f"Error en get_pressure_stats: {str(e)}")
+            logger.error("Error en get_pressure_stats: %s", e)
             raise
-        finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
 
     @staticmethod
     def get_humidity_stats():
-        conn = None
         try:
-            conn = DatabaseConnection.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            query = """
-            SELECT humidity, recorded_at 
-            FROM sensor_readings 
-            WHERE sensor_id = 5
-            AND recorded_at >= NOW() - INTERVAL 7 DAY
-            AND humidity IS NOT NULL
-            ORDER BY recorded_at
-            """
-            logger.debug(f"Ejecutando query humedad: {query}")
-            cursor.execute(query)
-            result = cursor.fetchall()
+            with DatabaseConnection.cursor(ANALYTICAL) as cursor:
+                query = """
+                SELECT humidity, recorded_at 
+                FROM sensor_readings 
+                WHERE sensor_id = 5
+                AND recorded_at >= NOW() - INTERVAL 7 DAY
+                AND humidity IS NOT NULL
+                ORDER BY recorded_at
+                """
+                logger.debug("Ejecutando query humedad: %s", query)
+                cursor.execute(query)
+                result = cursor.fetchall()
             
-            logger.debug(f"Resultados crudos: {result}")
+                logger.debug("Resultados crudos: %s", result)
             
-            if not result:
-                logger.warning("No se encontraron datos de humedad")
-                raise SensorDataNotFoundError()
+                if not result:
+                    logger.warning("No se encontraron datos de humedad")
+                    raise SensorDataNotFoundError()
                 
-            logger.info(f"Obtenidos {len(result)} registros de humedad")
-            return {"humidity": [r['humidity'] for r in result], "data": result}
+                logger.info("Obtenidos %s registros de humedad", len(result))
+                return {"humidity": [r['humidity'] for r in result], "data": result}
         except Exception as e:
-            logger.error(f"Error en get_humidity_stats: {str(e)}", exc_info=True)
+            logger.error("Error en get_humidity_stats: %s", e, exc_info=True)
             raise
-        finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
                 
     @staticmethod
     def get_humidity_history(days: int = 7):
         """Obtiene datos históricos de humedad"""
-        conn = None
         try:
-            conn = DatabaseConnection.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            query = """
-            SELECT humidity, recorded_at 
-            FROM sensor_readings 
-            WHERE sensor_id = 5
-            AND recorded_at >= NOW() - INTERVAL %s DAY
-            AND humidity IS NOT NULL
-            ORDER BY recorded_at
-            """
-            cursor.execute(query, (days,))
-            return cursor.fetchall()
+            with DatabaseConnection.cursor(ANALYTICAL) as cursor:
+                query = """
+                SELECT humidity, recorded_at 
+                FROM sensor_readings 
+                WHERE sensor_id = 5
+                AND recorded_at >= NOW() - INTERVAL %s DAY
+                AND humidity IS NOT NULL
+                ORDER BY recorded_at
+                """
+                cursor.execute(query, (days,))
+                return cursor.fetchall()
         except Exception as e:
-            logger.error(f"Error en get_humidity_history: {str(e)}")
+            logger.error("Error en get_humidity_history: %s", e)
             raise
-        finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
 
     @staticmethod
     def get_pressure_history(days: int = 7):
         """Obtiene datos históricos de presión"""
-        conn = None
         try:
-            conn = DatabaseConnection.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            query = """
-            SELECT pressure, recorded_at 
-            FROM sensor_readings 
-            WHERE sensor_id = 6
-            AND recorded_at >= NOW() - INTERVAL %s DAY
-            AND pressure IS NOT NULL
-            ORDER BY recorded_at
-            """
-            cursor.execute(query, (days,))
-            return cursor.fetchall()
+            with DatabaseConnection.cursor(ANALYTICAL) as cursor:
+                query = """
+                SELECT pressure, recorded_at 
+                FROM sensor_readings 
+                WHERE sensor_id = 6
+                AND recorded_at >= NOW() - INTERVAL %s DAY
+                AND pressure IS NOT NULL
+                ORDER BY recorded_at
+                """
+                cursor.execute(query, (days,))
+                return cursor.fetchall()
         except Exception as e:
-            logger.error(f"Error en get_pressure_history: {str(e)}")
+            logger.error("Error en get_pressure_history: %s", e)
             raise
-        finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
     @staticmethod
     def get_last_50_humidity_readings():
         """Obtiene los últimos 50 registros de humedad"""
-        conn = None
         try:
-            conn = DatabaseConnection.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            query = """
-            SELECT humidity, recorded_at 
-            FROM sensor_readings 
-            WHERE sensor_id = 5
-            AND humidity IS NOT NULL
-            ORDER BY recorded_at DESC
-            LIMIT 50
-            """
-            cursor.execute(query)
-            result = cursor.fetchall()
-            return result
+            with DatabaseConnection.cursor(INTERACTIVE) as cursor:
+                query = """
+                SELECT humidity, recorded_at 
+                FROM sensor_readings 
+                WHERE sensor_id = 5
+                AND humidity IS NOT NULL
+                ORDER BY recorded_at DESC
+                LIMIT 50
+                """
+                cursor.execute(query)
+                result = cursor.fetchall()
+                return result
         except Exception as e:
-            logger.error(f"Error en get_last_50_humidity_readings: {str(e)}")
+            logger.error("Error en get_last_50_humidity_readings: %s", e)
             raise
-        finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
 
     @staticmethod
     def get_last_50_pressure_readings():
         """Obtiene los últimos 50 registros de presión"""
-        conn = None
         try:
-            conn = DatabaseConnection.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            query = """
-            SELECT pressure, recorded_at 
-            FROM sensor_readings 
-            WHERE sensor_id = 6
-            AND pressure IS NOT NULL
-            ORDER BY recorded_at DESC
-            LIMIT 50
-            """
-            cursor.execute(query)
-            result = cursor.fetchall()
-            return result
+            with DatabaseConnection.cursor(INTERACTIVE) as cursor:
+                query = """
+                SELECT pressure, recorded_at 
+                FROM sensor_readings 
+                WHERE sensor_id = 6
+                AND pressure IS NOT NULL
+                ORDER BY recorded_at DESC
+                LIMIT 50
+                """
+                cursor.execute(query)
+                result = cursor.fetchall()
+                return result
+        except Exception as e:
+            logger.error("Error en get_last_50_pressure_readings: %s", e)
+            raise
+    @staticmethod
+    def get_metrics_buckets(metrics, resolution: int = 60, days: int = 7, sensor_id: int = None):
+        """
+        Promedio de varias métricas por ventana de `resolution` segundos,
+        agregado en la base de datos. Devuelve tuplas (ventana, *métricas)
+        solo de las ventanas con valores de todas las métricas.
+        """
+        invalid = [m for m in metrics if m not in METRIC_COLUMNS]
+        if invalid:
+            raise InvalidParameterError(f"Métricas no soportadas: {', '.join(invalid)}")
+
+        try:
+            with DatabaseConnection.cursor(ANALYTICAL, dictionary=False) as cursor:
+                averages = ", ".join(f"AVG({m}) AS {m}" for m in metrics)
+                query = f"""
+                SELECT FLOOR(UNIX_TIMESTAMP(recorded_at) / %s) AS bucket, {averages}
+                FROM sensor_readings
+                WHERE recorded_at >= NOW() - INTERVAL %s DAY
+                """
+                params = [resolution, days]
+                if sensor_id is not None:
+                    query += " AND sensor_id = %s"
+                    params.append(sensor_id)
+                query += " GROUP BY bucket HAVING " + " AND ".join(f"COUNT({m}) > 0" for m in metrics)
+                cursor.execute(query, tuple(params))
+                result = cursor.fetchall()
+                logger.info("Obtenidas %s ventanas de %s", len(result), ", ".join(metrics))
+                return result
+        except Exception as e:
+            logger.error("Error en get_metrics_buckets: %s", e)
+            raise
+
+    @staticmethod
+    def get_fleet_readings(days: int = 7):
+        """
+        Obtiene en una sola consulta las lecturas recientes de todos los
+        sensores, sin ordenar: calculate_group_stats agrupa en memoria.
+        """
+        try:
+            with DatabaseConnection.cursor(ANALYTICAL, dictionary=False) as cursor:
+                metrics = ", ".join(f"sr.{m}" for m in METRIC_COLUMNS)
+                query = f"""
+                SELECT s.id, s.name, s.type, {metrics}
+                FROM sensors s
+                JOIN sensor_readings sr ON sr.sensor_id = s.id
+                WHERE sr.recorded_at >= NOW() - INTERVAL %s DAY
+                """
+                cursor.execute(query, (days,))
+                result = cursor.fetchall()
+                logger.info("Obtenidos %s registros de la flota", len(result))
+                return result
+        except Exception as e:
+            logger.error("Error en get_fleet_readings: %s", e)
+            raise
+
+    @staticmethod
+    def get_readings_page(sensor_id: int, metric: str, limit: int, after=None, since=None, until=None):
+        """
+        Página de lecturas ordenada por (recorded_at, id) con paginación por
+        clave (keyset): `after` es el (recorded_at, id) de la última fila de
+        la página anterior. No usa OFFSET, así que el costo por página no
+        crece con la profundidad.
+        """
+        if metric not in METRIC_COLUMNS:
+            raise InvalidParameterError(f"Métrica no soportada: {metric}")
+
+        try:
+            with DatabaseConnection.cursor(INTERACTIVE) as cursor:
+                query = f"""
+                SELECT id, recorded_at, {metric} AS value
+                FROM sensor_readings
+                WHERE sensor_id = %s
+                AND {metric} IS NOT NULL
+                """
+                params = [sensor_id]
+                if since is not None:
+                    query += " AND recorded_at >= %s"
+                    params.append(since)
+                if until is not None:
+                    query += " AND recorded_at < %s"
+                    params.append(until)
+                if after is not None:
+                    query += " AND (recorded_at > %s OR (recorded_at = %s AND id > %s))"
+                    params.extend([after[0], after[0], after[1]])
+                query += " ORDER BY recorded_at, id LIMIT %s"
+                params.append(limit)
+
+                cursor.execute(query, tuple(params))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error("Error en get_readings_page: %s", e)
+            raise
+
+    @staticmethod
+    def get_readings_since(last_id: int, limit: int):
+        """
+        Lecturas con id mayor que `last_id`, en orden de inserción, como
+        tuplas (id, sensor_id, recorded_at, temperature, humidity, pressure).
+        Se lee del primario, coherente con get_latest_reading_id.
+        """
+        try:
+            with DatabaseConnection.cursor(INTERACTIVE, dictionary=False, primary=True) as cursor:
+                query = """
+                SELECT id, sensor_id, recorded_at, temperature, humidity, pressure
+                FROM sensor_readings
+                WHERE id > %s
+                ORDER BY id
+                LIMIT %s
+                """
+                cursor.execute(query, (last_id, limit))
+                return cursor.fetchall()
         except Exception as e:
-            logger.error(f"Error en get_last_50_pressure_readings: {str(e)}")
+            logger.error("Error en get_readings_since: %s", e)
             raise
-        finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
\ No newline at end of file
@@ -0,0 +1,81 @@
+#fastapi/app/database/resilience.py
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker para la base de datos.
+
+    - closed: las operaciones pasan; `failure_threshold` fallos seguidos lo abren.
+    - open: se rechaza todo de inmediato durante `reset_timeout` segundos.
+    - half_open: se deja pasar una sola operación de prueba; si funciona se
+      cierra, si falla vuelve a abrirse.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            # half_open: solo una prueba a la vez
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuito %s cerrado: base de datos recuperada", self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("Circuito %s abierto tras %d fallos", self.name, self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """Libera la prueba de half_open cuando la operación no fue concluyente"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def retry_after(self) -> int:
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0
+            return max(int(self.reset_timeout - (time.monotonic() - self._opened_at)) + 1, 1)
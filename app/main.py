@@ -1,24 +1,58 @@
 #fastapi/app\main.py
 # fastapi/app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import sensors
+from app.routers import health, sensors, probability, websocket
+from app.core.config import settings
 from app.core.exceptions import handle_app_exception
+from app.core.logging_config import setup_logging, shutdown_logging
+from app.core.middleware import CompressionMiddleware, RequestIdMiddleware
 from app.database.connection import DatabaseConnection
+from app.services.precompute_service import scheduler
+from app.utils.background_tasks import periodic_alert_evaluation, periodic_replica_check
+import asyncio
 import logging
 
-# Configuración básica de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
+# Logging no bloqueante: cola en memoria + hilo escritor (texto o JSON)
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        logger.info("Iniciando aplicación...")
+        # Test connection (primario)
+        DatabaseConnection.primary.ping()
+        logger.info("✅ Conexión a BD verificada correctamente")
+    except Exception as e:
+        logger.error("❌ Error inicial al conectar con BD: %s", e)
+
+    # Retraso de las réplicas: se revisa aquí y las solicitudes solo leen el último valor
+    replica_task = None
+    if DatabaseConnection.replicas:
+        replica_task = asyncio.create_task(periodic_replica_check(settings.DB_REPLICA_CHECK_INTERVAL))
+
+    # Evaluación de reglas de alerta sobre las lecturas nuevas
+    alert_task = None
+    if settings.ALERT_POLL_INTERVAL > 0:
+        alert_task = asyncio.create_task(periodic_alert_evaluation(settings.ALERT_POLL_INTERVAL))
+
+    # Precálculo de análisis: los endpoints sirven el último snapshot
+    if settings.PRECOMPUTE_INTERVAL > 0:
+        scheduler.start()
+
+    yield
+
+    logger.info("Deteniendo aplicación...")
+    for task in (replica_task, alert_task):
+        if task is not None:
+            task.cancel()
+    await scheduler.stop()
+    shutdown_logging()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configuración CORS
 app.add_middleware(
@@ -28,19 +62,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Incluir routers (solo el de sensores)
-app.include_router(sensors.router, prefix="/api")
+# Compresión brotli/gzip para payloads analíticos grandes
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
 
-@app.on_event("startup")
-async def startup_event():
-    try:
-        logger.info("Iniciando aplicación...")
-        # Test connection
-        conn = DatabaseConnection.get_connection()
-        conn.close()
-        logger.info("✅ Conexión a BD verificada correctamente")
-    except Exception as e:
-        logger.error(f"❌ Error inicial al conectar con BD: {e}")
+# Request id para correlacionar los logs de cada solicitud
+app.add_middleware(RequestIdMiddleware)
+
+# Incluir routers (salud, sensores, probabilidad y WebSocket de alertas)
+app.include_router(health.router)
+app.include_router(sensors.router, prefix="/api")
+app.include_router(probability.router, prefix="/api")
+app.include_router(websocket.router)
 
 @app.get("/")
 def read_root():
@@ -50,5 +82,5 @@ def read_root():
 # Manejo global de excepciones
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    logger.error(f"Excepción no manejada: {str(exc)}")
+    logger.error("Excepción no manejada: %s", exc)
     return handle_app_exception(exc)
\ No newline at end of file
@@ -1,5 +1,6 @@
 #fastapi/app/routers/health.py
-from fastapi import APIRouter
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
 from app.database.connection import DatabaseConnection
 
 router = APIRouter()
@@ -7,9 +8,14 @@ router = APIRouter()
 @router.get("/health")
 def health_check():
     try:
-        # Verificar conexión a la base de datos
-        conn = DatabaseConnection.get_connection()
-        conn.close()
-        return {"status": "healthy", "database": "connected"}
+        # Siempre el primario: get_connection() podría entregar una réplica
+        DatabaseConnection.primary.ping()
+        return {"status": "healthy", "database": "connected", "nodes": _nodes_status()}
     except Exception as e:
-        return {"status": "unhealthy", "error": str(e)}, 503
\ No newline at end of file
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unhealthy", "error": str(e), "nodes": _nodes_status()}
+        )
+
+def _nodes_status():
+    return [node.status() for node in DatabaseConnection.nodes()]
@@ -1,22 +1,22 @@
 # app/routers/probability.py
-from fastapi import APIRouter
-from app.services.probability_service import ProbabilityService
+from fastapi import APIRouter, Request, Response
+from app.services.precompute_service import scheduler, PROBABILITY_JOINT, PROBABILITY_BINOMIAL
 from app.core.exceptions import handle_app_exception
+from app.utils.http_cache import snapshot_response
 import logging
 
 router = APIRouter(tags=["Análisis Probabilístico"])
 
 @router.get("/probability/joint")
-async def joint_probability_analysis():
-    
+def joint_probability_analysis(request: Request, response: Response):
     try:
-        return await ProbabilityService.joint_probability_analysis()
+        return snapshot_response(request, response, scheduler.serve(PROBABILITY_JOINT))
     except Exception as e:
         handle_app_exception(e)
 
 @router.get("/probability/binomial")
-async def binomial_analysis():
+def binomial_analysis(request: Request, response: Response):
     try:
-        return await ProbabilityService.binomial_analysis()
+        return snapshot_response(request, response, scheduler.serve(PROBABILITY_BINOMIAL))
     except Exception as e:
-        handle_app_exception(e)
\ No newline at end of file
+        handle_app_exception(e)
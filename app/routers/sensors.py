@@ -1,34 +1,190 @@
 #fastapi/app/routers/sensors.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
 from app.services.sensor_service import SensorService
-from app.core.exceptions import handle_app_exception
+from app.services.alert_service import alert_service
+from app.services.precompute_service import scheduler, PRESSURE_STATS, HUMIDITY_STATS, JOINT_PROBABILITY
+from app.core.config import settings
+from app.core.exceptions import handle_app_exception, InvalidParameterError
+from app.database.connection import DatabaseConnection, ANALYTICAL
+from app.database.repositories import SensorRepository
+from app.utils.http_cache import latest_reading, build_etag, etag_matches, no_store, snapshot_response, versioned_response
+from app.utils.stale_cache import is_stale
+from app.utils.serialization import negotiate
+import asyncio
+import math
+import time
 
 router = APIRouter()
 
 @router.get("/sensors-data")
-def get_sensors_data():
+def get_sensors_data(request: Request, response: Response):
     try:
-        return SensorService.get_sensor_data()
+        return versioned_response(request, response, SensorService.get_sensor_data, records_key="sensors")
     except Exception as e:
         handle_app_exception(e)
 
+@router.get("/sensors-data/poll")
+async def poll_sensors_data(
+    request: Request,
+    response: Response,
+    last_id: Optional[int] = Query(None, ge=0),
+    timeout: float = Query(settings.LONG_POLL_TIMEOUT, gt=0, le=settings.LONG_POLL_TIMEOUT)
+):
+    """
+    Long-polling: espera hasta que exista una lectura más nueva que la que
+    conoce el cliente (last_id o If-None-Match) o hasta agotar el timeout,
+    en cuyo caso responde 304.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    deadline = time.monotonic() + timeout
+
+    def is_new(version):
+        if last_id is not None:
+            return version > last_id
+        return not etag_matches(if_none_match, build_etag(version))
+
+    def read_pinned():
+        # La versión anunciada sale del mismo nodo que los datos: una réplica
+        # atrasada no puede devolver datos viejos con el last_id del primario
+        with DatabaseConnection.pinned():
+            version = SensorRepository.get_latest_reading_id()
+            if not is_new(version):
+                return version, None
+            return version, SensorService.get_sensor_data()
+
+    try:
+        while True:
+            # Detección barata (compartida entre clientes) contra el primario
+            current = await run_in_threadpool(latest_reading.get)
+            if is_new(current):
+                current, data = await run_in_threadpool(read_pinned)
+                if is_stale(data):
+                    # Datos anteriores a `current`: no se anuncia esa versión
+                    no_store(response)
+                    return negotiate(request, response, {**data, "last_id": last_id}, records_key="sensors")
+                if data is not None:
+                    response.headers["ETag"] = build_etag(current)
+                    response.headers["Cache-Control"] = "no-cache"
+                    return negotiate(request, response, {**data, "last_id": current}, records_key="sensors")
+            etag = build_etag(current)
+            if time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(min(settings.LONG_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+    except Exception as e:
+        handle_app_exception(e)
+
+    raise HTTPException(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
+
 @router.get("/pressure-stats")
-def get_pressure_stats():
+def get_pressure_stats(request: Request, response: Response):
     try:
-        return SensorService.get_pressure_stats()
+        return snapshot_response(request, response, scheduler.serve(PRESSURE_STATS))
     except Exception as e:
         handle_app_exception(e)
 
 @router.get("/humidity-stats")
-def get_humidity_stats():
+def get_humidity_stats(request: Request, response: Response):
     try:
-        return SensorService.get_humidity_stats()
+        return snapshot_response(request, response, scheduler.serve(HUMIDITY_STATS))
     except Exception as e:
         handle_app_exception(e)
 
 @router.get("/joint-probability")
-def get_joint_probability():
+def get_joint_probability(request: Request, response: Response):
+    try:
+        return snapshot_response(request, response, scheduler.serve(JOINT_PROBABILITY))
+    except Exception as e:
+        handle_app_exception(e)
+
+@router.get("/history")
+def get_history(
+    request: Request,
+    response: Response,
+    sensor_id: Optional[int] = None,
+    metric: Optional[str] = None,
+    limit: int = Query(settings.HISTORY_PAGE_SIZE, ge=1, le=settings.HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+):
+    try:
+        return versioned_response(request, response, lambda: SensorService.get_readings_history(
+            sensor_id=sensor_id,
+            metric=metric,
+            limit=limit,
+            cursor=cursor,
+            since=since,
+            until=until
+        ), records_key="readings")
+    except Exception as e:
+        handle_app_exception(e)
+
+@router.get("/fleet-stats")
+def get_fleet_stats(
+    request: Request,
+    response: Response,
+    days: int = Query(7, ge=1, le=90)
+):
     try:
-        return SensorService.get_joint_probability_analysis()
+        return versioned_response(
+            request, response, lambda: SensorService.get_fleet_stats(days=days), query_class=ANALYTICAL, window=True
+        )
     except Exception as e:
-        handle_app_exception(e)
\ No newline at end of file
+        handle_app_exception(e)
+
+def _parse_conditions(given: Optional[str]):
+    """Convierte 'humidity:80,pressure:1010' en {'humidity': 80.0, 'pressure': 1010.0}"""
+    conditions = {}
+    if not given:
+        return conditions
+    for item in given.split(","):
+        name, sep, value = item.partition(":")
+        try:
+            conditions[name.strip()] = float(value)
+        except ValueError:
+            raise InvalidParameterError(f"Condición inválida: {item}")
+        # float() acepta "nan" e "inf", que pasarían los controles de rango
+        if not sep or not math.isfinite(conditions[name.strip()]):
+            raise InvalidParameterError(f"Condición inválida: {item}")
+    return conditions
+
+@router.get("/joint-distribution")
+def get_joint_distribution(
+    request: Request,
+    response: Response,
+    metrics: str = Query("temperature,humidity,pressure"),
+    bins: int = Query(10, ge=1, le=100),
+    binning: str = Query("quantile", pattern="^(quantile|width)$"),
+    days: int = Query(7, ge=1, le=365),
+    sensor_id: Optional[int] = None,
+    resolution: int = Query(60, ge=1, le=86400),
+    target: Optional[str] = None,
+    given: Optional[str] = None
+):
+    try:
+        conditions = _parse_conditions(given)
+        return versioned_response(request, response, lambda: SensorService.get_multivariate_analysis(
+            [m.strip() for m in metrics.split(",") if m.strip()],
+            bins=bins,
+            binning=binning,
+            days=days,
+            sensor_id=sensor_id,
+            resolution=resolution,
+            target=target,
+            given=conditions
+        ), query_class=ANALYTICAL, window=True)
+    except Exception as e:
+        handle_app_exception(e)
+
+@router.get("/alerts")
+def get_alerts():
+    """Reglas de alerta compiladas y últimas alertas disparadas"""
+    try:
+        return {"rules": alert_service.rules(), "recent": alert_service.recent_alerts()}
+    except Exception as e:
+        handle_app_exception(e)
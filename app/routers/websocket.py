@@ -1,6 +1,8 @@
 #fastapi/app/routers/websocket.py
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.services.sensor_service import SensorService
+from fastapi.concurrency import run_in_threadpool
+from app.services.alert_service import alert_service
+from app.services.precompute_service import scheduler, HUMIDITY_STATS
 import json
 import asyncio
 import logging
@@ -16,21 +18,24 @@ class ConnectionManager:
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
-        logger.info(f"Nueva conexión WebSocket. Total: {len(self.active_connections)}")
+        logger.info("Nueva conexión WebSocket. Total: %s", len(self.active_connections))
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-        logger.info(f"Conexión WebSocket cerrada. Total: {len(self.active_connections)}")
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+        logger.info("Conexión WebSocket cerrada. Total: %s", len(self.active_connections))
 
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
+        # Copia: disconnect() modifica la lista durante el recorrido
+        for connection in list(self.active_connections):
             try:
                 await connection.send_json(message)
             except Exception as e:
-                logger.error(f"Error enviando mensaje WebSocket: {str(e)}")
+                logger.error("Error enviando mensaje WebSocket: %s", e)
                 self.disconnect(connection)
 
 manager = ConnectionManager()
+alerts_manager = ConnectionManager()
 
 @router.websocket("/ws/humidity")
 async def websocket_humidity_endpoint(websocket: WebSocket):
@@ -41,8 +46,9 @@ async def websocket_humidity_endpoint(websocket: WebSocket):
             # (podríamos también usar ping/pong)
             await websocket.receive_text()
             
-            # Obtener datos de humedad
-            humidity_data = SensorService.get_humidity_stats()
+            # Snapshot precalculado; si hay que calcularlo, fuera del event loop
+            snapshot = await run_in_threadpool(scheduler.serve, HUMIDITY_STATS)
+            humidity_data = snapshot.value
             
             # Enviar datos al cliente
             await websocket.send_json({
@@ -56,5 +62,23 @@ async def websocket_humidity_endpoint(websocket: WebSocket):
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
-        logger.error(f"Error en WebSocket: {str(e)}")
-        manager.disconnect(websocket)
\ No newline at end of file
+        logger.error("Error en WebSocket: %s", e)
+        manager.disconnect(websocket)
+
+@router.websocket("/ws/alerts")
+async def websocket_alerts_endpoint(websocket: WebSocket):
+    """Alertas de las reglas en cuanto se evalúan las lecturas nuevas"""
+    await alerts_manager.connect(websocket)
+    try:
+        await websocket.send_json({
+            "type": "alerts_snapshot",
+            "data": alert_service.recent_alerts()
+        })
+        while True:
+            # Los mensajes del cliente solo mantienen viva la conexión
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        alerts_manager.disconnect(websocket)
+    except Exception as e:
+        logger.error("Error en WebSocket de alertas: %s", e)
+        alerts_manager.disconnect(websocket)
@@ -0,0 +1,103 @@
+#fastapi/app/services/alert_service.py
+import json
+import threading
+from collections import deque
+import numpy as np
+from app.core.config import settings
+from app.database.repositories import SensorRepository, METRIC_COLUMNS
+from app.utils.alert_rules import AlertEngine
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sensor de humedad (ver SensorRepository.get_humidity_stats)
+HUMIDITY_SENSOR_ID = 5
+
+
+def default_rules() -> list:
+    """Reglas vigentes cuando no se configura ALERT_RULES_FILE"""
+    return [{
+        "id": "humidity_high",
+        "sensor_id": HUMIDITY_SENSOR_ID,
+        "metric": "humidity",
+        "type": "threshold",
+        "op": ">",
+        "value": settings.HUMIDITY_HIGH_THRESHOLD,
+        "message": f"Humedad > {settings.HUMIDITY_HIGH_THRESHOLD:g}%"
+    }]
+
+
+def load_rules() -> list:
+    if not settings.ALERT_RULES_FILE:
+        return default_rules()
+    with open(settings.ALERT_RULES_FILE, encoding="utf-8") as f:
+        rules = json.load(f)
+    logger.info("Reglas de alerta cargadas desde %s", settings.ALERT_RULES_FILE)
+    return rules
+
+
+class AlertService:
+    """
+    Evalúa las reglas de alerta sobre las lecturas nuevas. Guarda el último
+    id procesado, así que cada lectura se evalúa una sola vez y nunca se
+    vuelve a recorrer el histórico.
+    """
+
+    def __init__(self, history_size: int = 200):
+        self.engine = None
+        self.last_id = None
+        self.recent = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    def rules(self) -> list:
+        with self._lock:
+            self._ensure_engine()
+            return list(self.engine.rules)
+
+    def recent_alerts(self) -> list:
+        return list(self.recent)
+
+    def _ensure_engine(self):
+        if self.engine is None:
+            self.engine = AlertEngine(load_rules())
+
+    def evaluate_new_readings(self) -> list:
+        """Procesa un lote de lecturas nuevas y devuelve las alertas disparadas"""
+        with self._lock:
+            self._ensure_engine()
+            if self.last_id is None:
+                # Al arrancar solo se vigilan las lecturas posteriores
+                self.last_id = SensorRepository.get_latest_reading_id()
+                logger.info("Motor de alertas desde la lectura %s", self.last_id)
+                return []
+
+            rows = SensorRepository.get_readings_since(self.last_id, settings.ALERT_BATCH_SIZE)
+            if not rows:
+                return []
+
+            reading_ids = np.array([row[0] for row in rows])
+            sensor_ids = np.array([row[1] for row in rows])
+            recorded_at = np.array([row[2] for row in rows], dtype="datetime64[us]")
+            times = recorded_at.astype(np.int64) / 1e6
+            columns = {
+                metric: np.array(
+                    [row[3 + i] if row[3 + i] is not None else np.nan for row in rows],
+                    dtype=float
+                )
+                for i, metric in enumerate(METRIC_COLUMNS)
+            }
+
+            alerts = self.engine.evaluate(sensor_ids, times, columns, reading_ids)
+            self.last_id = int(reading_ids[-1])
+
+            recorded_by_id = {row[0]: row[2] for row in rows}
+            for alert in alerts:
+                del alert["timestamp"]
+                alert["recorded_at"] = recorded_by_id[alert["reading_id"]].isoformat()
+            self.recent.extend(alerts)
+
+            logger.debug("Lote de %d lecturas evaluado: %d alertas", len(rows), len(alerts))
+            return alerts
+
+
+alert_service = AlertService(settings.ALERT_HISTORY_SIZE)
@@ -0,0 +1,28 @@
+#fastapi/app/services/precompute_service.py
+from app.core.config import settings
+from app.services.sensor_service import SensorService
+from app.services.probability_service import ProbabilityService
+from app.utils.precompute import PrecomputeScheduler
+
+PRESSURE_STATS = "pressure_stats"
+HUMIDITY_STATS = "humidity_stats"
+JOINT_PROBABILITY = "joint_probability"
+PROBABILITY_JOINT = "probability_joint"
+PROBABILITY_BINOMIAL = "probability_binomial"
+
+scheduler = PrecomputeScheduler(
+    interval=settings.PRECOMPUTE_INTERVAL,
+    min_interval=settings.PRECOMPUTE_MIN_INTERVAL,
+    check_interval=settings.PRECOMPUTE_CHECK_INTERVAL,
+    jitter=settings.PRECOMPUTE_JITTER,
+    concurrency=settings.PRECOMPUTE_CONCURRENCY,
+    retry_delay=settings.PRECOMPUTE_RETRY_DELAY,
+    max_age=settings.SNAPSHOT_MAX_AGE
+)
+
+# Análisis servidos desde snapshot
+scheduler.register(PRESSURE_STATS, SensorService.get_pressure_stats)
+scheduler.register(HUMIDITY_STATS, SensorService.get_humidity_stats)
+scheduler.register(JOINT_PROBABILITY, SensorService.get_joint_probability_analysis)
+scheduler.register(PROBABILITY_JOINT, ProbabilityService.joint_probability_analysis)
+scheduler.register(PROBABILITY_BINOMIAL, ProbabilityService.binomial_analysis)
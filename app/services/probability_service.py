@@ -1,7 +1,9 @@
 #fastapi/app/services/probability_service.py
+from app.core.config import settings
 from app.database.repositories import SensorRepository
 from app.utils.probability_calculator import ProbabilityAnalyzer
 from app.core.exceptions import SensorDataNotFoundError
+from app.utils.stale_cache import serve_stale_on_failure
 import numpy as np
 import logging
 
@@ -9,61 +11,65 @@ logger = logging.getLogger(__name__)
 
 class ProbabilityService:
     @staticmethod
-    async def joint_probability_analysis():
+    @serve_stale_on_failure("probability_joint")
+    def joint_probability_analysis():
         """Analiza probabilidad conjunta de humedad y presión"""
         try:
             logger.info("Iniciando análisis de probabilidad conjunta")
             
             # Obtener datos históricos
-            humidity_data = await SensorRepository.get_humidity_history()
-            pressure_data = await SensorRepository.get_pressure_history()
+            humidity_data = SensorRepository.get_humidity_history()
+            pressure_data = SensorRepository.get_pressure_history()
             
             if not humidity_data or not pressure_data:
                 raise SensorDataNotFoundError("Datos insuficientes para análisis")
             
-            # Calcular probabilidad conjunta
-            joint_prob, bins_h, bins_p = ProbabilityAnalyzer.calculate_joint_probability(
-                np.array([x['humidity'] for x in humidity_data]),
-                np.array([x['pressure'] for x in pressure_data])
+            # Son sensores distintos: se emparejan las lecturas más recientes
+            n = min(len(humidity_data), len(pressure_data))
+            joint_prob = ProbabilityAnalyzer.calculate_joint_probability(
+                np.array([float(x['humidity']) for x in humidity_data[-n:]]),
+                np.array([float(x['pressure']) for x in pressure_data[-n:]])
             )
             
             # Formatear resultados
             return {
-                "joint_probability": joint_prob.to_dict(),
-                "humidity_bins": bins_h.tolist(),
-                "pressure_bins": bins_p.tolist(),
+                "joint_probability": joint_prob["table"],
+                "humidity_bins": joint_prob["bins1"],
+                "pressure_bins": joint_prob["bins2"],
                 "analysis_type": "Probabilidad conjunta humedad-presión"
             }
             
         except Exception as e:
-            logger.error(f"Error en servicio de probabilidad conjunta: {str(e)}")
+            logger.error("Error en servicio de probabilidad conjunta: %s", e)
             raise
 
     @staticmethod
-    async def binomial_analysis():
+    @serve_stale_on_failure("probability_binomial")
+    def binomial_analysis():
         """Analiza distribución binomial de eventos de humedad alta"""
         try:
             logger.info("Iniciando análisis binomial")
             
             # Obtener datos históricos
-            humidity_data = await SensorRepository.get_humidity_history()
+            humidity_data = SensorRepository.get_humidity_history()
             
             if not humidity_data:
                 raise SensorDataNotFoundError("Datos de humedad no disponibles")
             
-            # Definir condición de éxito (humedad > 80%)
-            humidity_values = np.array([x['humidity'] for x in humidity_data])
+            # Condición de éxito: humedad sobre HUMIDITY_HIGH_THRESHOLD
+            threshold = settings.HUMIDITY_HIGH_THRESHOLD
+            humidity_values = np.array([float(x['humidity']) for x in humidity_data])
             result = ProbabilityAnalyzer.binomial_analysis(
                 humidity_values,
-                lambda x: x > 80
+                lambda x: x > threshold
             )
             
             return {
                 **result,
-                "analysis_type": "Distribución binomial de humedad > 80%",
-                "success_condition": "Humedad > 80%"
+                "analysis_type": f"Distribución binomial de humedad > {threshold:g}%",
+                "success_condition": f"Humedad > {threshold:g}%"
             }
             
         except Exception as e:
-            logger.error(f"Error en servicio de análisis binomial: {str(e)}")
+            logger.error("Error en servicio de análisis binomial: %s", e)
             raise
\ No newline at end of file
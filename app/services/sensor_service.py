@@ -1,8 +1,12 @@
 #fastapi/app/services/sensor_service.py
-from app.core.exceptions import SensorDataNotFoundError
-from app.database.repositories import SensorRepository
+from app.core.config import settings
+from app.core.exceptions import SensorDataNotFoundError, InvalidParameterError
+from app.database.repositories import SensorRepository, METRIC_COLUMNS
 from app.utils.probability_calculator import ProbabilityAnalyzer
-from app.utils.stats_calculator import calculate_stats
+from app.utils.joint_distribution import JointDistribution
+from app.utils.stats_calculator import summarize, calculate_group_stats
+from app.utils.stale_cache import serve_stale_on_failure
+from app.utils.pagination import encode_cursor, decode_cursor, parse_datetime
 import numpy as np
 import pandas as pd
 import logging
@@ -24,6 +28,7 @@ class SensorService:
         return data
 
     @staticmethod
+    @serve_stale_on_failure("sensor_data")
     def get_sensor_data():
         try:
             logger.info("Obteniendo datos de sensores...")
@@ -45,10 +50,11 @@ class SensorService:
             
             return {"sensors": processed_data}
         except Exception as e:
-            logger.error(f"Error en get_sensor_data: {str(e)}")
+            logger.error("Error en get_sensor_data: %s", e)
             raise
 
     @staticmethod
+    @serve_stale_on_failure("pressure_stats")
     def get_pressure_stats():
         try:
             logger.info("Calculando estadísticas de presión...")
@@ -59,8 +65,10 @@ class SensorService:
                 
             pressure_values = [float(r['pressure']) for r in data]
             
-            stats = calculate_stats(pressure_values)
-            enhanced_stats = ProbabilityAnalyzer.calculate_advanced_stats(pressure_values)
+            # Un solo ordenamiento para las estadísticas básicas y avanzadas
+            summary = summarize(pressure_values)
+            stats = summary["basic_stats"]
+            enhanced_stats = summary["advanced_stats"]
             
             prob_analysis = {
                 "binomial": ProbabilityAnalyzer.binomial_analysis(
@@ -79,10 +87,11 @@ class SensorService:
                 "data": pressure_values[-10:]
             })
         except Exception as e:
-            logger.error(f"Error en get_pressure_stats: {str(e)}")
+            logger.error("Error en get_pressure_stats: %s", e)
             raise
 
     @staticmethod
+    @serve_stale_on_failure("humidity_stats")
     def get_humidity_stats():
         try:
             logger.info("Calculando estadísticas de humedad...")
@@ -93,13 +102,15 @@ class SensorService:
                 
             humidity_values = [float(r['humidity']) for r in data]
             
-            stats = calculate_stats(humidity_values)
-            enhanced_stats = ProbabilityAnalyzer.calculate_advanced_stats(humidity_values)
+            # Un solo ordenamiento para las estadísticas básicas y avanzadas
+            summary = summarize(humidity_values)
+            stats = summary["basic_stats"]
+            enhanced_stats = summary["advanced_stats"]
             
             prob_analysis = {
                 "binomial": ProbabilityAnalyzer.binomial_analysis(
                     np.array(humidity_values),
-                    lambda x: x > 80
+                    lambda x: x > settings.HUMIDITY_HIGH_THRESHOLD
                 ),
                 "normal": ProbabilityAnalyzer.normal_distribution_analysis(
                     np.array(humidity_values))
@@ -113,10 +124,11 @@ class SensorService:
                 "data": humidity_values[-10:]
             })
         except Exception as e:
-            logger.error(f"Error en get_humidity_stats: {str(e)}")
+            logger.error("Error en get_humidity_stats: %s", e)
             raise
 
     @staticmethod
+    @serve_stale_on_failure("joint_probability")
     def get_joint_probability_analysis():
         try:
             logger.info("Calculando probabilidad conjunta humedad-presión...")
@@ -141,7 +153,7 @@ class SensorService:
             # Análisis binomial con condiciones corregidas
             binomial_h = ProbabilityAnalyzer.binomial_analysis(
                 h_values,
-                lambda x: x > 80  # Éxito = humedad > 80%
+                lambda x: x > settings.HUMIDITY_HIGH_THRESHOLD  # Éxito = humedad alta
             )
             
             binomial_p = ProbabilityAnalyzer.binomial_analysis(
@@ -173,5 +185,159 @@ class SensorService:
             logger.warning(str(e))
             return {"message": str(e)}
         except Exception as e:
-            logger.error(f"Error en get_joint_probability_analysis: {str(e)}", exc_info=True)
-            raise
\ No newline at end of file
+            logger.error("Error en get_joint_probability_analysis: %s", e, exc_info=True)
+            raise
+
+    @staticmethod
+    @serve_stale_on_failure("multivariate")
+    def get_multivariate_analysis(metrics, bins=10, binning="quantile", days=7,
+                                  sensor_id=None, resolution=60, target=None, given=None):
+        """
+        Distribución conjunta de N métricas. Las lecturas se alinean en
+        ventanas de `resolution` segundos porque cada métrica puede provenir
+        de un sensor distinto.
+        """
+        try:
+            logger.info("Calculando distribución conjunta de %s...", ', '.join(metrics))
+
+            if len(metrics) < 2:
+                raise InvalidParameterError("Se requieren al menos dos métricas")
+            if len(set(metrics)) != len(metrics):
+                raise InvalidParameterError("Métricas repetidas")
+            unknown = [m for m in metrics if m not in METRIC_COLUMNS]
+            if unknown:
+                raise InvalidParameterError(f"Métricas no soportadas: {', '.join(unknown)}")
+
+            # La base de datos promedia por ventana y descarta las ventanas
+            # sin observaciones simultáneas de todas las métricas
+            rows = SensorRepository.get_metrics_buckets(metrics, resolution=resolution, days=days, sensor_id=sensor_id)
+            if not rows:
+                raise SensorDataNotFoundError("No hay observaciones simultáneas de las métricas")
+            aligned = np.array([row[1:] for row in rows], dtype=float)
+
+            try:
+                joint = JointDistribution(aligned, metrics, bins=bins, binning=binning)
+                response = joint.to_dict()
+                if target is not None:
+                    response["conditional"] = joint.conditional(target, given or {})
+            except ValueError as e:
+                raise InvalidParameterError(str(e))
+
+            response["resolution_seconds"] = resolution
+            return SensorService._ensure_serializable(response)
+        except Exception as e:
+            logger.error("Error en get_multivariate_analysis: %s", e)
+            raise
+
+    @staticmethod
+    @serve_stale_on_failure("fleet_stats")
+    def get_fleet_stats(days=7):
+        """
+        Estadísticas básicas y avanzadas de todas las métricas de todos los
+        sensores con una sola consulta y un cálculo vectorizado por grupos.
+        """
+        try:
+            logger.info("Calculando estadísticas de la flota...")
+            rows = SensorRepository.get_fleet_readings(days=days)
+
+            if not rows:
+                raise SensorDataNotFoundError("No hay lecturas recientes de sensores")
+
+            ids, names, types, *columns = zip(*rows)
+            sensor_ids = np.array(ids)
+            # Los NULL de MySQL pasan a NaN y calculate_group_stats los descarta
+            readings = np.array(columns, dtype=float)
+
+            _, first = np.unique(sensor_ids, return_index=True)
+            sensors = {
+                ids[j]: {
+                    "sensor_id": ids[j],
+                    "sensor_name": names[j],
+                    "sensor_type": types[j],
+                    "metrics": {}
+                }
+                for j in first.tolist()
+            }
+
+            for i, metric in enumerate(METRIC_COLUMNS):
+                for sensor_id, stats in calculate_group_stats(sensor_ids, readings[i]).items():
+                    sensors[sensor_id]["metrics"][metric] = {
+                        "sample_size": stats["basic_stats"]["Cantidad de muestras"],
+                        **stats
+                    }
+
+            # calculate_group_stats ya devuelve tipos nativos
+            return {
+                "sensors": list(sensors.values()),
+                "sensor_count": len(sensors),
+                "reading_count": len(rows),
+                "days": days
+            }
+        except Exception as e:
+            logger.error("Error en get_fleet_stats: %s", e)
+            raise
+
+    @staticmethod
+    def get_readings_history(sensor_id=None, metric=None, limit=500, cursor=None, since=None, until=None):
+        """
+        Histórico paginado por cursor. El cursor lleva el filtro completo y la
+        posición (recorded_at, id) de la última fila entregada.
+        """
+        try:
+            after = None
+            if cursor is not None:
+                state = decode_cursor(cursor)
+                try:
+                    sensor_id = int(state["s"])
+                    metric = state["m"]
+                    since = parse_datetime(state.get("since"), "cursor")
+                    until = parse_datetime(state.get("until"), "cursor")
+                    after = (parse_datetime(state["t"], "cursor"), int(state["i"]))
+                except (KeyError, TypeError, ValueError):
+                    raise InvalidParameterError("Cursor de paginación inválido")
+            else:
+                if sensor_id is None or metric is None:
+                    raise InvalidParameterError("Se requieren sensor_id y metric (o un cursor)")
+                since = parse_datetime(since, "since")
+                until = parse_datetime(until, "until")
+
+            if metric not in METRIC_COLUMNS:
+                raise InvalidParameterError(f"Métrica no soportada: {metric}")
+
+            # Se pide una fila extra para saber si hay otra página
+            rows = SensorRepository.get_readings_page(
+                sensor_id, metric, limit + 1, after=after, since=since, until=until
+            )
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            next_cursor = None
+            if has_more:
+                last = rows[-1]
+                next_cursor = encode_cursor({
+                    "s": sensor_id,
+                    "m": metric,
+                    "since": since,
+                    "until": until,
+                    "t": last["recorded_at"],
+                    "i": last["id"]
+                })
+
+            return {
+                "sensor_id": sensor_id,
+                "metric": metric,
+                "readings": [
+                    {
+                        "id": row["id"],
+                        "recorded_at": row["recorded_at"].isoformat() if row["recorded_at"] else None,
+                        "value": float(row["value"])
+                    }
+                    for row in rows
+                ],
+                "count": len(rows),
+                "has_more": has_more,
+                "next_cursor": next_cursor
+            }
+        except Exception as e:
+            logger.error("Error en get_readings_history: %s", e)
+            raise
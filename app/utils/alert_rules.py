@@ -0,0 +1,251 @@
+#fastapi/app/utils/alert_rules.py
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+RULE_TYPES = ("threshold", "rate_of_change", "sustained", "zscore")
+METRICS = ("temperature", "humidity", "pressure")
+
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+}
+
+# Lecturas mínimas antes de evaluar reglas z-score
+ZSCORE_MIN_SAMPLES = 30
+
+
+def validate_rule(rule: dict) -> dict:
+    """Normaliza una regla declarativa y verifica sus campos"""
+    try:
+        normalized = {
+            "id": str(rule["id"]),
+            "sensor_id": int(rule["sensor_id"]),
+            "metric": rule["metric"],
+            "type": rule.get("type", "threshold"),
+        }
+        if normalized["metric"] not in METRICS:
+            raise ValueError(f"métrica no soportada: {normalized['metric']}")
+        if normalized["type"] not in RULE_TYPES:
+            raise ValueError(f"tipo no soportado: {normalized['type']}")
+
+        if normalized["type"] == "zscore":
+            normalized["z"] = float(rule["z"])
+        else:
+            normalized["op"] = rule.get("op", ">")
+            if normalized["op"] not in OPERATORS:
+                raise ValueError(f"operador no soportado: {normalized['op']}")
+            normalized["value"] = float(rule["value"])
+        if normalized["type"] == "rate_of_change":
+            # Cambio por `per` segundos (por defecto, por minuto)
+            normalized["per"] = float(rule.get("per", 60))
+        if normalized["type"] == "sustained":
+            normalized["duration"] = float(rule["duration"])
+        if "message" in rule:
+            normalized["message"] = str(rule["message"])
+        return normalized
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Regla de alerta inválida {rule.get('id', '?')}: {e}")
+
+
+class _RuleGroup:
+    """Reglas del mismo tipo y operador para un (sensor, métrica), como arrays"""
+
+    def __init__(self, rules, field):
+        self.rules = rules
+        self.ids = [rule["id"] for rule in rules]
+        self.values = np.array([rule[field] for rule in rules], dtype=float)
+
+
+class _SeriesRules:
+    """
+    Reglas compiladas de un (sensor, métrica) y el estado incremental que
+    necesitan entre lotes: si el umbral ya estaba cruzado, última lectura
+    (tasa de cambio), racha en curso (duración sostenida) y media/varianza
+    acumuladas (z-score).
+    """
+
+    def __init__(self, rules):
+        by_kind = {}
+        for rule in rules:
+            key = (rule["type"], rule.get("op"))
+            by_kind.setdefault(key, []).append(rule)
+
+        self.threshold = {}
+        self.rate = {}
+        self.sustained = {}
+        self.zscore = None
+        for (rule_type, op), group in by_kind.items():
+            if rule_type == "threshold":
+                threshold = _RuleGroup(group, "value")
+                threshold.active = np.zeros(len(group), dtype=bool)
+                self.threshold[op] = threshold
+            elif rule_type == "rate_of_change":
+                self.rate[op] = _RuleGroup(group, "value")
+                self.rate[op].per = np.array([rule["per"] for rule in group])
+            elif rule_type == "sustained":
+                sustained = _RuleGroup(group, "value")
+                sustained.duration = np.array([rule["duration"] for rule in group])
+                sustained.run_start = np.full(len(group), np.nan)
+                sustained.fired = np.zeros(len(group), dtype=bool)
+                self.sustained[op] = sustained
+            else:
+                self.zscore = _RuleGroup(group, "z")
+
+        self.last_value = None
+        self.last_time = None
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def evaluate(self, times, values):
+        """
+        times (segundos) y values ordenados por tiempo. Devuelve una lista de
+        (índice de lectura, _RuleGroup, índice de regla).
+        """
+        hits = []
+
+        for op, group in self.threshold.items():
+            condition = OPERATORS[op](values[:, None], group.values[None, :])
+            # Solo se avisa al cruzar el umbral, no en cada lectura que sigue cruzada
+            previous = np.vstack([group.active[None, :], condition[:-1]])
+            group.active = condition[-1]
+            hits.extend(self._collect(condition & ~previous, group))
+
+        if self.rate:
+            previous_values = np.r_[self.last_value if self.last_value is not None else np.nan, values[:-1]]
+            previous_times = np.r_[self.last_time if self.last_time is not None else np.nan, times[:-1]]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rate = (values - previous_values) / (times - previous_times)
+            rate = np.where(np.isfinite(rate), rate, np.nan)
+            for op, group in self.rate.items():
+                with np.errstate(invalid="ignore"):
+                    matrix = OPERATORS[op](rate[:, None] * group.per[None, :], group.values[None, :])
+                hits.extend(self._collect(matrix, group))
+
+        for op, group in self.sustained.items():
+            hits.extend(self._evaluate_sustained(times, values, op, group))
+
+        if self.zscore is not None:
+            hits.extend(self._evaluate_zscore(values))
+
+        self.last_value = float(values[-1])
+        self.last_time = float(times[-1])
+        return hits
+
+    @staticmethod
+    def _collect(matrix, group):
+        rows, columns = np.nonzero(matrix)
+        return [(row, group, column) for row, column in zip(rows.tolist(), columns.tolist())]
+
+    @staticmethod
+    def _evaluate_sustained(times, values, op, group):
+        n = len(values)
+        condition = OPERATORS[op](values[:, None], group.values[None, :])
+
+        # Inicio de la racha verdadera en curso para cada lectura y regla
+        positions = np.arange(n)[:, None]
+        last_false = np.maximum.accumulate(np.where(condition, -1, positions), axis=0)
+        carried = np.where(np.isnan(group.run_start), times[0], group.run_start)
+        start = np.where(
+            last_false < 0,
+            carried[None, :],
+            times[np.minimum(last_false + 1, n - 1)]
+        )
+        satisfied = condition & (times[:, None] - start >= group.duration[None, :])
+
+        # Solo se avisa al cumplirse la duración, no en cada lectura posterior
+        previous = np.vstack([group.fired[None, :], satisfied[:-1]])
+        # Una lectura falsa reinicia la racha
+        previous &= np.vstack([np.ones((1, len(group.ids)), dtype=bool), condition[:-1]])
+        new_hits = satisfied & ~previous
+
+        group.run_start = np.where(condition[-1], start[-1], np.nan)
+        group.fired = satisfied[-1]
+        return _SeriesRules._collect(new_hits, group)
+
+    def _evaluate_zscore(self, values):
+        group = self.zscore
+        n = len(values)
+
+        # Media y varianza de todo lo visto antes de cada lectura, sin recorrer
+        # el histórico: estado acumulado + sumas prefijas del lote, centradas en
+        # la media previa para conservar precisión
+        reference = self.mean
+        shifted = values - reference
+        prefix_sum = np.r_[0.0, np.cumsum(shifted)[:-1]]
+        prefix_sq = np.r_[0.0, np.cumsum(shifted * shifted)[:-1]]
+        count = self.count + np.arange(n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_shift = prefix_sum / count
+            variance = (self.m2 + prefix_sq) / count - mean_shift ** 2
+            std = np.sqrt(np.maximum(variance, 0.0))
+            z = np.abs(shifted - mean_shift) / std
+        z = np.where((count >= ZSCORE_MIN_SAMPLES) & (std > 0), z, np.nan)
+
+        with np.errstate(invalid="ignore"):
+            matrix = z[:, None] > group.values[None, :]
+
+        # Actualización de Welford con el lote completo
+        batch_mean = values.mean()
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.m2 = self.m2 + batch_m2 + delta ** 2 * self.count * n / total
+        self.mean = self.mean + delta * n / total
+        self.count = total
+
+        return self._collect(matrix, group)
+
+
+class AlertEngine:
+    """Reglas indexadas por (sensor, métrica) y evaluadas de forma incremental"""
+
+    def __init__(self, rules):
+        self.rules = [validate_rule(rule) for rule in rules]
+        grouped = {}
+        for rule in self.rules:
+            grouped.setdefault((rule["sensor_id"], rule["metric"]), []).append(rule)
+        self._index = {key: _SeriesRules(group) for key, group in grouped.items()}
+        self._rules_by_id = {rule["id"]: rule for rule in self.rules}
+        logger.info("Motor de alertas compilado: %d reglas en %d series", len(self.rules), len(self._index))
+
+    def evaluate(self, sensor_ids, times, columns, reading_ids=None):
+        """
+        Evalúa un lote de lecturas nuevas. `columns` asocia cada métrica a
+        su array de valores (NaN si la lectura no la trae); todo ordenado
+        por tiempo. Devuelve la lista de alertas disparadas.
+        """
+        sensor_ids = np.asarray(sensor_ids)
+        times = np.asarray(times, dtype=float)
+        alerts = []
+
+        for sensor_id in np.unique(sensor_ids).tolist():
+            in_sensor = sensor_ids == sensor_id
+            for metric, values in columns.items():
+                series = self._index.get((sensor_id, metric))
+                if series is None:
+                    continue
+                mask = in_sensor & ~np.isnan(values)
+                if not mask.any():
+                    continue
+                positions = np.flatnonzero(mask)
+                series_values = np.asarray(values, dtype=float)[positions]
+                for row, group, column in series.evaluate(times[positions], series_values):
+                    rule = self._rules_by_id[group.ids[column]]
+                    position = positions[row]
+                    alerts.append({
+                        "rule_id": rule["id"],
+                        "rule_type": rule["type"],
+                        "sensor_id": sensor_id,
+                        "metric": metric,
+                        "value": float(series_values[row]),
+                        "threshold": float(group.values[column]),
+                        "timestamp": float(times[position]),
+                        "reading_id": int(reading_ids[position]) if reading_ids is not None else None,
+                        "message": rule.get("message")
+                    })
+        return alerts
@@ -1,6 +1,10 @@
 #fastapi/app/utils/background_tasks.py
 import asyncio
+from fastapi.concurrency import run_in_threadpool
 from app.services.sensor_service import SensorService
+from app.services.alert_service import alert_service
+from app.routers.websocket import alerts_manager
+from app.database.connection import DatabaseConnection
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,6 +16,30 @@ async def periodic_humidity_broadcast(interval: int = 5):
             await SensorService.broadcast_humidity_update()
             logger.debug("Humidity update broadcasted via WebSocket")
         except Exception as e:
-            logger.error(f"Error in periodic humidity broadcast: {str(e)}")
+            logger.error("Error in periodic humidity broadcast: %s", e)
         
-        await asyncio.sleep(interval)
\ No newline at end of file
+        await asyncio.sleep(interval)
+
+async def periodic_alert_evaluation(interval: float = 5):
+    """Evalúa las reglas de alerta sobre las lecturas nuevas y las difunde por WebSocket"""
+    while True:
+        try:
+            # La consulta y la evaluación son síncronas: fuera del event loop
+            alerts = await run_in_threadpool(alert_service.evaluate_new_readings)
+            if alerts:
+                logger.info("%d alertas disparadas", len(alerts))
+                await alerts_manager.broadcast({"type": "alerts", "data": alerts})
+        except Exception as e:
+            logger.error("Error en la evaluación periódica de alertas: %s", e)
+
+        await asyncio.sleep(interval)
+
+async def periodic_replica_check(interval: float = 10):
+    """Revisa el retraso de las réplicas fuera de las solicitudes"""
+    while True:
+        try:
+            await run_in_threadpool(DatabaseConnection.check_replicas)
+        except Exception as e:
+            logger.error("Error revisando réplicas: %s", e)
+
+        await asyncio.sleep(interval)
@@ -0,0 +1,124 @@
+#fastapi/app/utils/http_cache.py
+import threading
+import time
+from fastapi import Response, status
+from app.core.config import settings
+from app.core.exceptions import DatabaseConnectionError
+from app.database.connection import DatabaseConnection, INTERACTIVE
+from app.database.repositories import SensorRepository
+from app.utils.serialization import negotiate
+from app.utils.stale_cache import is_stale
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LatestReadingTracker:
+    """
+    Cachea por unos instantes el id de la última lectura para que muchos
+    clientes haciendo polling compartan una sola consulta a la base de datos.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> int:
+        if self._value is not None and time.monotonic() - self._fetched_at < self.ttl:
+            return self._value
+        with self._lock:
+            # Otro hilo pudo refrescar el valor mientras esperábamos el lock
+            if self._value is None or time.monotonic() - self._fetched_at >= self.ttl:
+                self._value = SensorRepository.get_latest_reading_id()
+                self._fetched_at = time.monotonic()
+            return self._value
+
+
+latest_reading = LatestReadingTracker(settings.LATEST_READING_TTL)
+
+
+def build_etag(reading_id: int, window: bool = False) -> str:
+    # Débil: la representación puede variar (p. ej. compresión) con los mismos datos
+    if window:
+        # La ventana se desliza aunque no lleguen lecturas: el ETag incluye
+        # el tramo de tiempo para que el contenido se renueve
+        return f'W/"sr-{reading_id}-{int(time.time() // settings.ETAG_WINDOW_SECONDS)}"'
+    return f'W/"sr-{reading_id}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de ETags según RFC 9110"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
+
+
+def no_store(response):
+    """
+    Un resultado stale no corresponde a ninguna versión: sin ETag y sin
+    caché, para que el cliente no lo revalide como vigente al recuperarse
+    la base de datos.
+    """
+    if "ETag" in response.headers:
+        del response.headers["ETag"]
+    response.headers["Cache-Control"] = "no-store"
+
+
+def versioned_response(request, response, compute, records_key=None, query_class: str = INTERACTIVE,
+                       window: bool = False):
+    """
+    Respuesta validada con un ETag derivado del último sensor_readings.id.
+    La versión y los datos se leen del mismo nodo (pinned): con réplicas, una
+    versión del primario etiquetaría como nuevos datos atrasados. Si el
+    cliente ya tiene esa versión responde 304 sin calcular los datos.
+    Sin base de datos no hay versión que comparar: se omite el ETag y
+    `compute` decide si puede servir un resultado anterior.
+    `window` marca las rutas cuyo contenido depende de NOW() (ventanas de
+    n días), que deben revalidarse aunque no haya lecturas nuevas.
+    """
+    with DatabaseConnection.pinned(query_class):
+        try:
+            etag = build_etag(SensorRepository.get_latest_reading_id(), window)
+        except DatabaseConnectionError:
+            etag = None
+        if etag is not None and etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        content = compute()
+    if is_stale(content):
+        no_store(response)
+    elif etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+    return negotiate(request, response, content, records_key=records_key)
+
+
+def snapshot_response(request, response, snapshot):
+    """
+    Respuesta de un snapshot precalculado. La validación condicional se hace
+    contra la versión con la que se calculó, no contra la última lectura:
+    mientras el snapshot no se refresca el cliente que ya lo tiene recibe 304.
+    """
+    if is_stale(snapshot.value):
+        no_store(response)
+    elif snapshot.version is not None:
+        etag = build_etag(snapshot.version)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+    return negotiate(request, response, snapshot.value)
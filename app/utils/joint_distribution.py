@@ -0,0 +1,165 @@
+#fastapi/app/utils/joint_distribution.py
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+BINNING_STRATEGIES = ("width", "quantile")
+
+
+class JointDistribution:
+    """
+    Distribución conjunta de N variables continuas.
+
+    Las celdas se guardan en forma dispersa: solo los índices planos de las
+    celdas con observaciones y su conteo, de modo que una tabla 3-D sobre
+    meses de lecturas ocupa memoria proporcional a las celdas ocupadas y no
+    al producto de los bins.
+    """
+
+    def __init__(self, data, names, bins=10, binning="width"):
+        if binning not in BINNING_STRATEGIES:
+            raise ValueError(f"Estrategia de binning no soportada: {binning}")
+
+        data = np.asarray(data, dtype=float)
+        if data.ndim != 2 or data.shape[1] != len(names):
+            raise ValueError("Los datos deben ser una matriz (n, len(names))")
+
+        # Solo se analizan observaciones completas
+        data = data[~np.isnan(data).any(axis=1)]
+        if data.shape[0] == 0:
+            raise ValueError("No hay observaciones completas para analizar")
+
+        self.names = list(names)
+        self.binning = binning
+        self.data = data
+        self.n = int(data.shape[0])
+
+        self.edges = [self._edges(data[:, i], bins, binning) for i in range(data.shape[1])]
+        self.shape = tuple(len(e) - 1 for e in self.edges)
+
+        indices = np.column_stack([
+            self._digitize(data[:, i], self.edges[i]) for i in range(data.shape[1])
+        ])
+        flat = np.ravel_multi_index(indices.T, self.shape)
+        self.keys, self.counts = np.unique(flat, return_counts=True)
+
+        logger.info(
+            "Distribución conjunta calculada: %d variables, %d observaciones, %d celdas ocupadas",
+            len(self.names), self.n, len(self.keys)
+        )
+
+    @staticmethod
+    def _edges(values, bins, binning):
+        if binning == "quantile":
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)))
+        else:
+            edges = np.linspace(values.min(), values.max(), bins + 1)
+
+        # Variable constante: un único bin alrededor del valor
+        if len(edges) < 2 or edges[0] == edges[-1]:
+            edges = np.array([edges[0] - 0.5, edges[0] + 0.5])
+        return edges
+
+    @staticmethod
+    def _digitize(values, edges):
+        """Índice de bin con el último bin cerrado por la derecha, como np.histogram"""
+        return np.searchsorted(edges[1:-1], values, side="right")
+
+    def _axis(self, name):
+        try:
+            return self.names.index(name)
+        except ValueError:
+            raise ValueError(f"Variable no incluida en el análisis: {name}")
+
+    def _coords(self):
+        return np.unravel_index(self.keys, self.shape)
+
+    def marginal(self, names):
+        """Distribución marginal dispersa sobre un subconjunto de variables"""
+        axes = [self._axis(name) for name in names]
+        coords = self._coords()
+        shape = tuple(self.shape[a] for a in axes)
+        flat = np.ravel_multi_index([coords[a] for a in axes], shape)
+        keys, inverse = np.unique(flat, return_inverse=True)
+        counts = np.bincount(inverse, weights=self.counts)
+        return keys, counts, shape
+
+    def conditional(self, target, given):
+        """
+        P(target | given), donde given asocia variable -> valor observado.
+        La condición se evalúa sobre el bin que contiene cada valor.
+        """
+        target_axis = self._axis(target)
+        coords = self._coords()
+
+        mask = np.ones(len(self.keys), dtype=bool)
+        condition_bins = {}
+        for name, value in given.items():
+            axis = self._axis(name)
+            if axis == target_axis:
+                raise ValueError("La variable objetivo no puede ser parte de la condición")
+            if not np.isfinite(value):
+                raise ValueError(f"Valor no finito para {name}: {value}")
+            edges = self.edges[axis]
+            if value < edges[0] or value > edges[-1]:
+                raise ValueError(f"Valor fuera del rango observado para {name}: {value}")
+            b = int(self._digitize(np.array([value]), edges)[0])
+            condition_bins[name] = [float(edges[b]), float(edges[b + 1])]
+            mask &= coords[axis] == b
+
+        support = int(self.counts[mask].sum())
+        probabilities = np.zeros(self.shape[target_axis])
+        if support:
+            probabilities = np.bincount(
+                coords[target_axis][mask],
+                weights=self.counts[mask],
+                minlength=self.shape[target_axis]
+            ) / support
+
+        return {
+            "target": target,
+            "given": condition_bins,
+            "support": support,
+            "bins": self.edges[target_axis].tolist(),
+            "probabilities": probabilities.tolist()
+        }
+
+    def correlation_matrix(self):
+        if self.n < 2:
+            return np.full((len(self.names), len(self.names)), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.atleast_2d(np.corrcoef(self.data, rowvar=False))
+
+    def covariance_matrix(self):
+        if self.n < 2:
+            return np.full((len(self.names), len(self.names)), np.nan)
+        return np.atleast_2d(np.cov(self.data, rowvar=False))
+
+    @staticmethod
+    def _finite_or_none(matrix):
+        """NaN no es serializable a JSON (p. ej. correlación de una variable constante)"""
+        return np.where(np.isfinite(matrix), matrix, None).tolist()
+
+    def to_dict(self):
+        coords = np.column_stack(self._coords())
+        probabilities = self.counts / self.n
+        return {
+            "variables": self.names,
+            "binning": self.binning,
+            "observations": self.n,
+            "shape": list(self.shape),
+            "bins": {name: edges.tolist() for name, edges in zip(self.names, self.edges)},
+            "cells": [
+                {"bin": c, "probability": p}
+                for c, p in zip(coords.tolist(), probabilities.tolist())
+            ],
+            "marginals": {
+                name: (np.bincount(
+                    coords[:, i], weights=self.counts, minlength=self.shape[i]
+                ) / self.n).tolist()
+                for i, name in enumerate(self.names)
+            },
+            "correlation": self._finite_or_none(self.correlation_matrix()),
+            "covariance": self._finite_or_none(self.covariance_matrix())
+        }
@@ -0,0 +1,132 @@
+#fastapi/app/utils/normality.py
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+import numpy as np
+from scipy import stats
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Shapiro-Wilk pierde precisión (y scipy advierte) por encima de 5000 muestras
+SHAPIRO_MAX_N = 5000
+# D'Agostino K² es O(n) y fiable hasta aquí; más allá se aplica sobre una
+# submuestra (con n enormes cualquier desviación mínima da p≈0)
+DAGOSTINO_MAX_N = 100_000
+# Tamaño de la submuestra determinista para n enormes
+SKETCH_SIZE = 10_000
+SKETCH_SEED = 0
+
+METHODS = ("shapiro", "dagostino", "anderson")
+
+# scipy >= 1.17 da p-valor para Anderson-Darling (method=) y depreca
+# critical_values/significance_level, que desaparecen en 1.19
+ANDERSON_HAS_PVALUE = "method" in inspect.signature(stats.anderson).parameters
+
+
+class NormalityTester:
+    """
+    Prueba de normalidad con costo acotado: elige el test según el tamaño
+    de la muestra y cachea el resultado por versión de los datos.
+    """
+
+    def __init__(self, alpha: float = 0.05, max_entries: int = 64):
+        self.alpha = alpha
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def select_method(n: int) -> str:
+        if n <= SHAPIRO_MAX_N:
+            return "shapiro"
+        return "dagostino"
+
+    @staticmethod
+    def data_version(data: np.ndarray) -> str:
+        """Huella del contenido para usar como versión cuando el llamador no la da"""
+        return hashlib.blake2b(np.ascontiguousarray(data).tobytes(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _subsample(data: np.ndarray, size: int) -> np.ndarray:
+        """Submuestra determinista: misma entrada, misma muestra"""
+        if len(data) <= size:
+            return data
+        rng = np.random.default_rng(SKETCH_SEED)
+        return data[np.sort(rng.choice(len(data), size=size, replace=False))]
+
+    def _run(self, data: np.ndarray, method: str) -> dict:
+        n = len(data)
+        sample = data
+
+        if method == "shapiro":
+            sample = self._subsample(data, SHAPIRO_MAX_N)
+            result = stats.shapiro(sample)
+            statistic, p_value = result.statistic, result.pvalue
+        elif method == "dagostino":
+            sample = self._subsample(data, n if n <= DAGOSTINO_MAX_N else SKETCH_SIZE)
+            result = stats.normaltest(sample)
+            statistic, p_value = result.statistic, result.pvalue
+        elif method == "anderson" and ANDERSON_HAS_PVALUE:
+            sample = self._subsample(data, DAGOSTINO_MAX_N)
+            # p-valor interpolado en las tablas de Stephens (acotado a 0.01-0.15)
+            result = stats.anderson(sample, dist="norm", method="interpolate")
+            statistic, p_value = result.statistic, result.pvalue
+        elif method == "anderson":
+            sample = self._subsample(data, DAGOSTINO_MAX_N)
+            result = stats.anderson(sample, dist="norm")
+            # Anderson-Darling no da p-valor: se compara contra el valor crítico de alpha
+            level = int(round(self.alpha * 100 * 10)) / 10
+            levels = list(result.significance_level)
+            critical = result.critical_values[levels.index(level) if level in levels else levels.index(5.0)]
+            return {
+                "method": method,
+                "statistic": float(result.statistic),
+                "p_value": None,
+                "critical_value": float(critical),
+                "is_normal": bool(result.statistic < critical),
+                "sample_size": int(len(sample)),
+                "n": int(n)
+            }
+        else:
+            raise ValueError(f"Método de normalidad no soportado: {method}")
+
+        return {
+            "method": method,
+            "statistic": float(statistic),
+            "p_value": float(p_value),
+            "is_normal": bool(p_value > self.alpha),
+            "sample_size": int(len(sample)),
+            "n": int(n)
+        }
+
+    def test(self, data, method: str = None, version=None) -> dict:
+        data = np.asarray(data, dtype=float)
+        n = len(data)
+        if n < 3:
+            return {"method": None, "statistic": None, "p_value": None,
+                    "is_normal": None, "sample_size": int(n), "n": int(n)}
+
+        method = method or self.select_method(n)
+        if method not in METHODS:
+            raise ValueError(f"Método de normalidad no soportado: {method}")
+
+        key = (version if version is not None else self.data_version(data), n, method)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        result = self._run(data, method)
+        logger.info("Test de normalidad %s sobre %s/%s muestras", method, result['sample_size'], n)
+
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+
+normality_tester = NormalityTester()
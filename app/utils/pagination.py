@@ -0,0 +1,38 @@
+#fastapi/app/utils/pagination.py
+import base64
+import binascii
+import json
+from datetime import datetime
+from app.core.exceptions import InvalidParameterError
+
+
+def encode_cursor(state: dict) -> str:
+    """Token opaco de continuación (base64url de JSON compacto)"""
+    raw = json.dumps(state, separators=(",", ":"), default=_encode_value).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> dict:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise InvalidParameterError("Cursor de paginación inválido")
+    if not isinstance(state, dict):
+        raise InvalidParameterError("Cursor de paginación inválido")
+    return state
+
+
+def parse_datetime(value, field: str):
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise InvalidParameterError(f"Fecha inválida en {field}")
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable en cursor: {type(value).__name__}")
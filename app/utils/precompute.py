@@ -0,0 +1,190 @@
+#fastapi/app/utils/precompute.py
+import asyncio
+import random
+import threading
+import time
+from collections import namedtuple
+from fastapi.concurrency import run_in_threadpool
+from app.core.exceptions import DatabaseConnectionError
+from app.database.connection import DatabaseConnection
+from app.database.repositories import SensorRepository
+from app.utils.http_cache import latest_reading
+from app.utils.stale_cache import is_stale
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Resultado de un análisis y la versión de datos (último sensor_readings.id)
+# con la que se calculó
+Snapshot = namedtuple("Snapshot", ["version", "value", "computed_at"])
+
+
+class _Job:
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+        # Compartido por el planificador y el cálculo síncrono de respaldo:
+        # nunca hay dos cálculos del mismo análisis a la vez
+        self.lock = threading.Lock()
+        self.running = False
+        self.not_before = 0.0
+        self.next_cadence = 0.0
+
+
+class PrecomputeScheduler:
+    """
+    Recalcula en segundo plano los análisis registrados cuando llegan datos
+    nuevos o cada `interval` segundos, y guarda el resultado como snapshot
+    versionado que los endpoints sirven directamente.
+
+    - Deduplicación: un solo cálculo en curso por análisis.
+    - Como mucho un cálculo cada `min_interval` segundos por análisis, para
+      que una ráfaga de lecturas no dispare un cálculo por lectura.
+    - Jitter sobre la cadencia y los intervalos para no sincronizar la carga.
+    - `concurrency` limita los cálculos simultáneos (pool analítico).
+    """
+
+    def __init__(self, interval: float, min_interval: float, check_interval: float,
+                 jitter: float = 0.1, concurrency: int = 2, retry_delay: float = 30,
+                 max_age: float = 300):
+        self.interval = interval
+        self.min_interval = min_interval
+        self.check_interval = check_interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.retry_delay = retry_delay
+        self.max_age = max_age
+        self._jobs = {}
+        self._snapshots = {}
+        self._task = None
+        self._inflight = set()
+
+    def register(self, name: str, func):
+        self._jobs[name] = _Job(name, func)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def get(self, name: str):
+        """Snapshot de `name` si no supera max_age, o None"""
+        snapshot = self._snapshots.get(name)
+        if snapshot is None or time.time() - snapshot.computed_at > self.max_age:
+            return None
+        if not self.running:
+            # Sin planificador nadie lo refresca: solo vale si sigue siendo la
+            # versión vigente (sin base de datos se sirve mientras no caduque)
+            current = self._current_version()
+            if current is not None and snapshot.version != current:
+                return None
+        return snapshot
+
+    def serve(self, name: str) -> Snapshot:
+        """
+        Snapshot vigente o, si no lo hay (planificador detenido o atrasado),
+        cálculo síncrono. Las solicitudes concurrentes esperan ese cálculo
+        en lugar de repetirlo.
+        """
+        snapshot = self.get(name)
+        if snapshot is not None:
+            return snapshot
+
+        job = self._jobs[name]
+        with job.lock:
+            # Otro hilo pudo calcularlo mientras esperábamos el lock
+            snapshot = self.get(name)
+            if snapshot is not None:
+                return snapshot
+            logger.info("Sin snapshot vigente de %s, calculando en la solicitud", name)
+            return self._compute(job)
+
+    def _compute(self, job) -> Snapshot:
+        # La versión y los datos salen del mismo nodo: con réplicas, una
+        # versión del primario etiquetaría como nuevos datos atrasados
+        with DatabaseConnection.pinned():
+            try:
+                version = SensorRepository.get_latest_reading_id()
+            except DatabaseConnectionError:
+                # Sin versión; el análisis puede servir aún su resultado stale
+                version = None
+            value = job.func()
+        # Un resultado antiguo servido por la caché stale no es un snapshot
+        # nuevo ni corresponde a la versión leída: se devuelve sin versión
+        if is_stale(value):
+            logger.warning("%s devolvió un resultado stale; se conserva el snapshot anterior", job.name)
+            return Snapshot(None, value, time.time())
+        snapshot = Snapshot(version, value, time.time())
+        self._snapshots[job.name] = snapshot
+        return snapshot
+
+    def _refresh_sync(self, job):
+        with job.lock:
+            return self._compute(job)
+
+    @staticmethod
+    def _current_version():
+        try:
+            return latest_reading.get()
+        except DatabaseConnectionError:
+            return None
+
+    def _is_due(self, job, version, now) -> bool:
+        if job.running or now < job.not_before:
+            return False
+        snapshot = self._snapshots.get(job.name)
+        if snapshot is None or now >= job.next_cadence:
+            return True
+        return version is not None and snapshot.version != version
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * (1 + random.uniform(-self.jitter, self.jitter))
+
+    async def _refresh(self, job, semaphore):
+        try:
+            async with semaphore:
+                started = time.perf_counter()
+                snapshot = await run_in_threadpool(self._refresh_sync, job)
+            logger.debug("Snapshot de %s (versión %s) en %.0f ms", job.name, snapshot.version, (time.perf_counter() - started) * 1000)
+            now = time.monotonic()
+            job.not_before = now + self._jittered(self.min_interval)
+            job.next_cadence = now + self._jittered(self.interval)
+        except Exception as e:
+            logger.warning("Error precalculando %s: %s", job.name, e)
+            job.not_before = time.monotonic() + self._jittered(self.retry_delay)
+        finally:
+            job.running = False
+
+    async def _run(self):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # Arranque escalonado de los análisis
+        for job in self._jobs.values():
+            job.not_before = time.monotonic() + random.uniform(0, self.check_interval)
+        while True:
+            try:
+                version = await run_in_threadpool(self._current_version)
+                now = time.monotonic()
+                for job in self._jobs.values():
+                    if self._is_due(job, version, now):
+                        job.running = True
+                        task = asyncio.create_task(self._refresh(job, semaphore))
+                        self._inflight.add(task)
+                        task.add_done_callback(self._inflight.discard)
+            except Exception as e:
+                # Un error (p. ej. de MySQL fuera de DatabaseConnectionError) no
+                # debe detener el planificador para siempre
+                logger.error("Error en el planificador de precálculo: %s", e)
+
+            await asyncio.sleep(self.check_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Planificador de precálculo iniciado: %s", ", ".join(self._jobs))
+
+    async def stop(self):
+        tasks = [task for task in (self._task, *self._inflight) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        logger.info("Planificador de precálculo detenido")
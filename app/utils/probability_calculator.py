@@ -2,6 +2,8 @@
 import numpy as np
 from scipy import stats
 import pandas as pd
+from app.utils.normality import normality_tester
+from app.utils.stats_calculator import summarize
 import logging
 
 logger = logging.getLogger(__name__)
@@ -48,7 +50,7 @@ class ProbabilityAnalyzer:
             }
             
         except Exception as e:
-            logger.error(f"Error calculando probabilidad conjunta: {str(e)}")
+            logger.error("Error calculando probabilidad conjunta: %s", e)
             raise
 
     @staticmethod
@@ -69,7 +71,7 @@ class ProbabilityAnalyzer:
             var = float(n_trials * p * (1 - p))
             std = float(np.sqrt(var))
             
-            logger.info(f"Análisis binomial completado: p={p:.3f}, éxitos={successes}/{n_trials}")
+            logger.info("Análisis binomial completado: p=%.3f, éxitos=%s/%s", p, successes, n_trials)
             
             result = {
                 "n_trials": int(n_trials),
@@ -84,67 +86,49 @@ class ProbabilityAnalyzer:
             return ProbabilityAnalyzer._convert_to_native(result)
             
         except Exception as e:
-            logger.error(f"Error en análisis binomial: {str(e)}")
+            logger.error("Error en análisis binomial: %s", e)
             raise
 
     @staticmethod
-    def normal_distribution_analysis(data):
-        """Analiza cómo se ajustan los datos a una distribución normal"""
+    def normal_distribution_analysis(data, method=None, version=None):
+        """
+        Analiza cómo se ajustan los datos a una distribución normal.
+        El test se elige según el tamaño de la muestra (ver NormalityTester);
+        `version` identifica los datos para reutilizar resultados cacheados.
+        """
         try:
-            mean = float(np.mean(data))
-            std = float(np.std(data))
-            
-            shapiro_test = stats.shapiro(data)
-            
+            data = np.asarray(data, dtype=float)
+            mean = float(data.mean())
+            std = float(data.std())
+
+            normality = normality_tester.test(data, method=method, version=version)
+
+            x = np.linspace(data.min(), data.max(), 100)
             result = {
                 "mean": mean,
                 "std_dev": std,
-                "shapiro_test": {
-                    "statistic": float(shapiro_test.statistic),
-                    "p_value": float(shapiro_test.pvalue),
-                    "is_normal": bool(shapiro_test.pvalue > 0.05)
-                },
+                "normality_test": normality,
                 "pdf": {
-                    "x": np.linspace(min(data), max(data), 100).tolist(),
-                    "y": stats.norm.pdf(
-                        np.linspace(min(data), max(data), 100),
-                        loc=mean, scale=std
-                    ).tolist()
+                    "x": x.tolist(),
+                    "y": stats.norm.pdf(x, loc=mean, scale=std).tolist()
                 }
             }
-            
+            if normality["method"] == "shapiro":
+                # Se conserva la forma anterior de la respuesta
+                result["shapiro_test"] = {
+                    "statistic": normality["statistic"],
+                    "p_value": normality["p_value"],
+                    "is_normal": normality["is_normal"]
+                }
+
             return ProbabilityAnalyzer._convert_to_native(result)
         except Exception as e:
-            logger.error(f"Error en análisis normal: {str(e)}")
+            logger.error("Error en análisis normal: %s", e)
             raise
 
     @staticmethod
     def calculate_advanced_stats(data):
         """Calcula estadísticas avanzadas para un conjunto de datos"""
-        if not data or len(data) == 0:
+        if data is None or len(data) == 0:
             return {}
-        
-        series = pd.Series(data)
-        stats = {
-            "mean": float(series.mean()),
-            "median": float(series.median()),
-            "mode": [float(x) for x in series.mode().tolist()],
-            "skew": float(series.skew()),
-            "kurtosis": float(series.kurtosis()),
-            "min": float(series.min()),
-            "max": float(series.max()),
-            "std": float(series.std()),
-            "percentiles": {
-                "25": float(series.quantile(0.25)),
-                "50": float(series.quantile(0.5)),
-                "75": float(series.quantile(0.75))
-            }
-        }
-        
-        freq, bins = np.histogram(data, bins=10)
-        stats["relative_frequency"] = {
-            "bins": bins.tolist(),
-            "counts": (freq / len(data)).tolist()
-        }
-        
-        return ProbabilityAnalyzer._convert_to_native(stats)
\ No newline at end of file
+        return summarize(data)["advanced_stats"]
@@ -0,0 +1,89 @@
+#fastapi/app/utils/serialization.py
+import json
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import logging
+
+try:
+    import msgpack
+except ImportError:  # formato binario opcional
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # formato columnar opcional
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def _accepted_media_types(accept: str):
+    """Lista de tipos aceptados ordenada por q (descendente)"""
+    accepted = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media_type and q > 0:
+            accepted.append((-q, position, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(accepted)]
+
+
+def _available(media_type: str, tabular: bool) -> bool:
+    if media_type in MSGPACK_MEDIA_TYPES:
+        return msgpack is not None
+    if media_type == ARROW_MEDIA_TYPE:
+        return pa is not None and tabular
+    return media_type in (JSON_MEDIA_TYPE, "application/*", "*/*")
+
+
+def _to_arrow(content, records_key):
+    table = pa.Table.from_pylist(content[records_key])
+    # El resto del payload (cursor, metadatos) viaja en los metadatos del esquema
+    extra = {k: v for k, v in content.items() if k != records_key}
+    if extra:
+        table = table.replace_schema_metadata({
+            "payload": json.dumps(jsonable_encoder(extra))
+        })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def negotiate(request: Request, response: Response, content, records_key: str = None) -> Response:
+    """
+    Serializa `content` en el formato preferido por el cliente según Accept:
+    JSON (por defecto), MessagePack o Arrow IPC (solo para payloads tabulares,
+    es decir, con una lista de registros en `records_key`).
+    Conserva los encabezados ya fijados en `response` (p. ej. ETag).
+    """
+    tabular = (
+        records_key is not None
+        and isinstance(content, dict)
+        and isinstance(content.get(records_key), list)
+    )
+    media_type = next(
+        (m for m in _accepted_media_types(request.headers.get("accept", "")) if _available(m, tabular)),
+        JSON_MEDIA_TYPE
+    )
+
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    headers["Vary"] = "Accept"
+
+    if media_type in MSGPACK_MEDIA_TYPES:
+        body = msgpack.packb(jsonable_encoder(content), use_bin_type=True)
+        return Response(content=body, media_type=MSGPACK_MEDIA_TYPES[0], headers=headers)
+    if media_type == ARROW_MEDIA_TYPE:
+        return Response(content=_to_arrow(content, records_key), media_type=ARROW_MEDIA_TYPE, headers=headers)
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
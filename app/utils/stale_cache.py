@@ -0,0 +1,74 @@
+#fastapi/app/utils/stale_cache.py
+import functools
+import threading
+import time
+from collections import OrderedDict
+from app.core.config import settings
+from app.core.exceptions import DatabaseConnectionError
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StaleCache:
+    """Último resultado correcto de cada análisis, acotado en entradas (LRU)"""
+
+    def __init__(self, max_age: float, max_entries: int = 128):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Devuelve (valor, timestamp) si no supera max_age, o None"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.time() - entry[1] > self.max_age:
+            return None
+        return entry
+
+
+stale_cache = StaleCache(settings.STALE_MAX_AGE)
+
+
+def is_stale(value) -> bool:
+    """True si `value` es un resultado anterior servido por serve_stale_on_failure"""
+    return isinstance(value, dict) and bool(value.get("stale"))
+
+
+def serve_stale_on_failure(name: str):
+    """
+    Si la base de datos no está disponible (caída, timeout o circuito
+    abierto) devuelve el último resultado correcto marcado como `stale`
+    en lugar de propagar el error.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (name, repr(args), repr(sorted(kwargs.items())))
+            try:
+                result = func(*args, **kwargs)
+            except DatabaseConnectionError:
+                entry = stale_cache.get(key)
+                if entry is None or not isinstance(entry[0], dict):
+                    raise
+                value, stored_at = entry
+                age = time.time() - stored_at
+                logger.warning("Base de datos no disponible, sirviendo %s con %.0fs de antigüedad", name, age)
+                return {
+                    **value,
+                    "stale": True,
+                    "stale_age_seconds": round(age, 1),
+                    "computed_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(stored_at))
+                }
+            stale_cache.store(key, result)
+            return result
+        return wrapper
+    return decorator
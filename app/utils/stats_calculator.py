@@ -1,35 +1,166 @@
 #fastapi/app/utils/stats_calculator.py
 import numpy as np
-from scipy import stats
+
 
 def calculate_stats(values):
-    stats_dict = {
-        "Media": float(np.mean(values)),
-        "Mediana": float(np.median(values)),
-        "Mínimo": float(np.min(values)),
-        "Máximo": float(np.max(values)),
-        "Rango": float(np.ptp(values)),
-        "Desviación Estándar": float(np.std(values)),
-        "Cantidad de muestras": len(values)
-    }
-    
-    try:
-        unique_values, counts = np.unique(values, return_counts=True)
-        max_count = np.max(counts)
-        modes = unique_values[counts == max_count]
-        
+    return summarize(values)["basic_stats"]
+
+
+def _finite_or_none(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def summarize(values, bins=10):
+    """
+    Kernel fusionado: ordena los datos una sola vez y de ahí obtiene
+    estadísticos de orden, momentos, moda e histograma. Devuelve a la vez
+    la forma de calculate_stats ("basic_stats") y la de
+    ProbabilityAnalyzer.calculate_advanced_stats ("advanced_stats").
+    """
+    v = np.sort(np.asarray(values, dtype=float).ravel())
+    v = v[~np.isnan(v)]
+    if len(v) == 0:
+        raise ValueError("No hay datos para calcular estadísticas")
+    return _segment_stats(v, np.array([0]), bins)[0]
+
+
+def calculate_group_stats(groups, values, bins=10):
+    """
+    Equivalente a summarize para muchos grupos a la vez (p. ej. un grupo
+    por sensor). Se ordena una sola vez por (grupo, valor) y todo se obtiene
+    con reducciones por segmento, sin recorrer los grupos en Python.
+    Devuelve {grupo: {"basic_stats": ..., "advanced_stats": ...}}.
+    """
+    groups = np.asarray(groups)
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    groups, values = groups[valid], values[valid]
+    if len(values) == 0:
+        return {}
+
+    order = np.lexsort((values, groups))
+    g = groups[order]
+    v = values[order]
+    starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+    return dict(zip(g[starts].tolist(), _segment_stats(v, starts, bins)))
+
+
+def _segment_stats(v, starts, bins):
+    """
+    Estadísticos de cada segmento v[starts[i]:starts[i + 1]], que debe venir
+    ordenado de forma ascendente.
+    """
+    total = len(v)
+    ends = np.r_[starts[1:], total]
+    n = (ends - starts).astype(float)
+    seg = np.repeat(np.arange(len(starts)), (ends - starts))
+
+    # Momentos centrales por segmento
+    mean = np.add.reduceat(v, starts) / n
+    d = v - mean[seg]
+    d2 = d * d
+    s2 = np.add.reduceat(d2, starts)
+    s3 = np.add.reduceat(d2 * d, starts)
+    s4 = np.add.reduceat(d2 * d2, starts)
+    s2 = np.where(np.abs(s2) < 1e-14, 0.0, s2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std_pop = np.sqrt(s2 / n)
+        std_sample = np.where(n > 1, np.sqrt(s2 / (n - 1)), np.nan)
+
+        # Sesgo sesgado (scipy.stats.skew) y ajustado (pandas)
+        skew_biased = np.where(s2 > 0, (s3 / n) / (s2 / n) ** 1.5, np.nan)
+        skew_adjusted = np.where(
+            n < 3, np.nan,
+            np.where(s2 > 0, n * np.sqrt(n - 1) / (n - 2) * s3 / s2 ** 1.5, 0.0)
+        )
+        # Curtosis en exceso ajustada (pandas)
+        kurtosis = np.where(
+            n < 4, np.nan,
+            np.where(
+                s2 > 0,
+                n * (n + 1) * (n - 1) * s4 / ((n - 2) * (n - 3) * s2 ** 2)
+                - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)),
+                0.0
+            )
+        )
+
+    # Estadísticos de orden sobre los datos ya ordenados
+    minimum = v[starts]
+    maximum = v[ends - 1]
+
+    def quantile(q):
+        position = (n - 1) * q
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, (ends - starts) - 1)
+        fraction = position - lower
+        low_values = v[starts + lower]
+        return low_values + fraction * (v[starts + upper] - low_values)
+
+    q25, median, q75 = quantile(0.25), quantile(0.5), quantile(0.75)
+
+    # Moda: rachas de valores iguales dentro de cada segmento
+    run_starts = np.flatnonzero(np.r_[True, (v[1:] != v[:-1]) | (seg[1:] != seg[:-1])])
+    run_lengths = np.diff(np.r_[run_starts, total])
+    run_seg = seg[run_starts]
+    first_run = np.flatnonzero(np.r_[True, run_seg[1:] != run_seg[:-1]])
+    max_run = np.maximum.reduceat(run_lengths, first_run)
+    mode_runs = run_lengths == max_run[run_seg]
+    mode_values = v[run_starts[mode_runs]]
+    mode_bounds = np.searchsorted(run_seg[mode_runs], np.arange(len(starts) + 1))
+
+    # Histograma de `bins` bins por segmento, con la semántica de np.histogram
+    first_edge = np.where(minimum == maximum, minimum - 0.5, minimum)
+    last_edge = np.where(minimum == maximum, maximum + 0.5, maximum)
+    edges = np.linspace(first_edge, last_edge, bins + 1, axis=1)
+    norm = bins / (last_edge - first_edge)
+    indices = ((v - first_edge[seg]) * norm[seg]).astype(np.intp)
+    indices[indices == bins] -= 1
+    indices[v < edges[seg, indices]] -= 1
+    increment = (v >= edges[seg, np.minimum(indices + 1, bins)]) & (indices != bins - 1)
+    indices[increment] += 1
+    histogram = np.bincount(seg * bins + indices, minlength=len(starts) * bins).reshape(-1, bins)
+    frequencies = histogram / n[:, None]
+
+    results = []
+    for i in range(len(starts)):
+        modes = mode_values[mode_bounds[i]:mode_bounds[i + 1]]
         if len(modes) == 1:
-            stats_dict["Moda"] = float(modes[0])
-        elif len(modes) > 1:
-            stats_dict["Moda"] = f"Múltiples modas: {', '.join(map(str, modes))}"
+            basic_mode = float(modes[0])
         else:
-            stats_dict["Moda"] = "No disponible"
-    except Exception:
-        stats_dict["Moda"] = "No disponible"
-    
-    try:
-        stats_dict["Sesgo"] = float(stats.skew(values))
-    except Exception:
-        stats_dict["Sesgo"] = "No disponible"
-    
-    return stats_dict
+            basic_mode = f"Múltiples modas: {', '.join(map(str, modes))}"
+
+        results.append({
+            "basic_stats": {
+                "Media": float(mean[i]),
+                "Mediana": float(median[i]),
+                "Mínimo": float(minimum[i]),
+                "Máximo": float(maximum[i]),
+                "Rango": float(maximum[i] - minimum[i]),
+                "Desviación Estándar": float(std_pop[i]),
+                "Cantidad de muestras": int(n[i]),
+                "Moda": basic_mode,
+                "Sesgo": _finite_or_none(skew_biased[i])
+            },
+            "advanced_stats": {
+                "mean": float(mean[i]),
+                "median": float(median[i]),
+                "mode": modes.tolist(),
+                "skew": _finite_or_none(skew_adjusted[i]),
+                "kurtosis": _finite_or_none(kurtosis[i]),
+                "min": float(minimum[i]),
+                "max": float(maximum[i]),
+                "std": _finite_or_none(std_sample[i]),
+                "percentiles": {
+                    "25": float(q25[i]),
+                    "50": float(median[i]),
+                    "75": float(q75[i])
+                },
+                "relative_frequency": {
+                    "bins": edges[i].tolist(),
+                    "counts": frequencies[i].tolist()
+                }
+            }
+        })
+    return results
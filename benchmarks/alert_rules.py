@@ -0,0 +1,61 @@
+#fastapi/benchmarks/alert_rules.py
+"""
+Motor de alertas: evaluaciones regla-lectura por segundo sobre lotes
+incrementales, con reglas repartidas entre sensores y métricas.
+
+    python -m benchmarks.alert_rules
+"""
+import time
+import numpy as np
+
+from app.utils.alert_rules import AlertEngine
+
+SENSORS = 50
+RULE_COUNTS = (100, 1_000, 5_000)
+BATCH_SIZE = 5_000
+BATCHES = 10
+
+
+def make_rules(count, rng):
+    rules = []
+    kinds = ("threshold", "rate_of_change", "sustained", "zscore")
+    for i in range(count):
+        rule = {
+            "id": f"r{i}",
+            "sensor_id": int(rng.integers(SENSORS)),
+            "metric": ("temperature", "humidity", "pressure")[i % 3],
+            "type": kinds[i % 4],
+        }
+        if rule["type"] == "zscore":
+            rule["z"] = 3.0
+        else:
+            rule["op"] = ">"
+            rule["value"] = 1.0 if rule["type"] == "rate_of_change" else float(rng.normal(50, 10))
+        if rule["type"] == "sustained":
+            rule["duration"] = 300.0
+        rules.append(rule)
+    return rules
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'reglas':>8}{'lote (ms)':>12}{'evaluaciones/s':>18}{'alertas':>10}")
+    for count in RULE_COUNTS:
+        engine = AlertEngine(make_rules(count, rng))
+        elapsed = 0.0
+        alerts = 0
+        for batch in range(BATCHES):
+            times = batch * BATCH_SIZE + np.arange(BATCH_SIZE, dtype=float)
+            sensor_ids = rng.integers(SENSORS, size=BATCH_SIZE)
+            columns = {metric: rng.normal(50, 10, BATCH_SIZE) for metric in ("temperature", "humidity", "pressure")}
+            start = time.perf_counter()
+            alerts += len(engine.evaluate(sensor_ids, times, columns))
+            elapsed += time.perf_counter() - start
+
+        # Cada lectura de un sensor se contrasta con todas sus reglas
+        evaluations = count / SENSORS * BATCH_SIZE * BATCHES
+        print(f"{count:>8}{elapsed / BATCHES * 1000:>12.2f}{evaluations / elapsed:>18,.0f}{alerts:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#fastapi/benchmarks/logging_overhead.py
+"""
+Costo del logging en el hilo de la solicitud: configuración anterior
+(StreamHandler síncrono + f-strings) frente a la cola con formato diferido.
+
+    python -m benchmarks.logging_overhead
+"""
+import datetime
+import logging
+import os
+import time
+from logging.handlers import QueueListener
+import queue
+
+from app.core.logging_config import LazyQueueHandler, RequestIdFilter, TEXT_FORMAT
+
+ROWS = [
+    {"id": i, "sensor_id": i % 8, "temperature": 21.5, "humidity": 63.2, "pressure": 1012.4,
+     "recorded_at": datetime.datetime(2026, 1, 1, 12, 0, i % 60)}
+    for i in range(200)
+]
+ITERATIONS = 200
+
+
+def request_before(logger):
+    logger.info(f"Obtenidos {len(ROWS)} registros de sensores")
+    for row in ROWS:
+        logger.debug(f"Dato sensor: {row}")
+    logger.debug(f"Resultados crudos: {ROWS}")
+
+
+def request_after(logger):
+    logger.info("Obtenidos %s registros de sensores", len(ROWS))
+    if logger.isEnabledFor(logging.DEBUG):
+        for row in ROWS:
+            logger.debug("Dato sensor: %s", row)
+    logger.debug("Resultados crudos: %s", ROWS)
+
+
+def measure(logger, request):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        request(logger)
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main():
+    devnull = open(os.devnull, "w")
+
+    before = logging.getLogger("bench.before")
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    before.addHandler(handler)
+    before.setLevel(logging.INFO)
+    before.propagate = False
+
+    after = logging.getLogger("bench.after")
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    stream_handler = logging.StreamHandler(devnull)
+    stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    after.addHandler(queue_handler)
+    after.setLevel(logging.INFO)
+    after.propagate = False
+
+    print(f"{'configuración':<40}{'µs por solicitud':>18}")
+    print(f"{'antes (StreamHandler + f-strings)':<40}{measure(before, request_before):>18.1f}")
+    print(f"{'después (cola + formato diferido)':<40}{measure(after, request_after):>18.1f}")
+
+    listener.stop()
+    devnull.close()
+
+
+if __name__ == "__main__":
+    main()
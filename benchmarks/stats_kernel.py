@@ -0,0 +1,79 @@
+#fastapi/benchmarks/stats_kernel.py
+"""
+Estadísticas de /pressure-stats y /humidity-stats: las dos funciones por
+separado (implementación anterior, reproducida aquí) frente a summarize.
+
+    python -m benchmarks.stats_kernel
+"""
+import time
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from app.utils.stats_calculator import summarize
+
+SIZES = (50, 1_000, 10_000, 100_000, 1_000_000)
+
+
+def separate_calculate_stats(values):
+    result = {
+        "Media": float(np.mean(values)),
+        "Mediana": float(np.median(values)),
+        "Mínimo": float(np.min(values)),
+        "Máximo": float(np.max(values)),
+        "Rango": float(np.ptp(values)),
+        "Desviación Estándar": float(np.std(values)),
+        "Cantidad de muestras": len(values)
+    }
+    unique_values, counts = np.unique(values, return_counts=True)
+    modes = unique_values[counts == np.max(counts)]
+    result["Moda"] = float(modes[0]) if len(modes) == 1 else f"Múltiples modas: {', '.join(map(str, modes))}"
+    result["Sesgo"] = float(stats.skew(values))
+    return result
+
+
+def separate_advanced_stats(data):
+    series = pd.Series(data)
+    result = {
+        "mean": float(series.mean()),
+        "median": float(series.median()),
+        "mode": [float(x) for x in series.mode().tolist()],
+        "skew": float(series.skew()),
+        "kurtosis": float(series.kurtosis()),
+        "min": float(series.min()),
+        "max": float(series.max()),
+        "std": float(series.std()),
+        "percentiles": {
+            "25": float(series.quantile(0.25)),
+            "50": float(series.quantile(0.5)),
+            "75": float(series.quantile(0.75))
+        }
+    }
+    freq, bins = np.histogram(data, bins=10)
+    result["relative_frequency"] = {"bins": bins.tolist(), "counts": (freq / len(data)).tolist()}
+    return result
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'n':>10}{'por separado (ms)':>20}{'summarize (ms)':>18}{'aceleración':>14}")
+    for n in SIZES:
+        # Lecturas con un decimal, como las del sensor
+        values = rng.normal(1013, 5, n).round(1).tolist()
+        repeat = 20 if n <= 10_000 else 3
+        before = best_of(lambda: (separate_calculate_stats(values), separate_advanced_stats(values)), repeat)
+        after = best_of(lambda: summarize(values), repeat)
+        print(f"{n:>10}{before:>20.2f}{after:>18.2f}{before / after:>13.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#fastapi/tests/test_alert_rules.py
+"""
+El motor vectorizado (AlertEngine) debe dar las mismas alertas que una
+evaluación lectura a lectura, sin importar cómo se partan las lecturas en
+lotes: el estado de cada regla se arrastra de un lote al siguiente.
+"""
+import numpy as np
+import pytest
+
+from app.utils.alert_rules import OPERATORS, ZSCORE_MIN_SAMPLES, AlertEngine
+
+RULES = [
+    {"id": "alta", "sensor_id": 1, "metric": "humidity", "type": "threshold", "op": ">", "value": 60},
+    {"id": "baja", "sensor_id": 1, "metric": "humidity", "type": "threshold", "op": "<=", "value": 40},
+    {"id": "subida", "sensor_id": 1, "metric": "humidity", "type": "rate_of_change", "op": ">", "value": 20, "per": 60},
+    {"id": "bajada", "sensor_id": 1, "metric": "humidity", "type": "rate_of_change", "op": "<", "value": -20, "per": 60},
+    {"id": "sostenida", "sensor_id": 1, "metric": "humidity", "type": "sustained", "op": ">", "value": 55, "duration": 120},
+    {"id": "sostenida_larga", "sensor_id": 1, "metric": "humidity", "type": "sustained", "op": ">", "value": 50, "duration": 600},
+    {"id": "atipica", "sensor_id": 1, "metric": "humidity", "type": "zscore", "z": 2.0},
+    {"id": "presion", "sensor_id": 2, "metric": "pressure", "type": "threshold", "op": ">=", "value": 1015},
+    {"id": "presion_z", "sensor_id": 2, "metric": "pressure", "type": "zscore", "z": 2.5},
+]
+
+
+def reference_alerts(rules, sensor_ids, times, columns, reading_ids):
+    """Evaluación lectura a lectura con el estado explícito de cada regla"""
+    alerts = set()
+    for rule in rules:
+        active = False
+        last = None
+        run_start = None
+        fired = False
+        history = []
+        values = columns[rule["metric"]]
+        for i in range(len(times)):
+            if sensor_ids[i] != rule["sensor_id"] or np.isnan(values[i]):
+                continue
+            t, v = times[i], values[i]
+            if rule["type"] == "threshold":
+                condition = bool(OPERATORS[rule["op"]](v, rule["value"]))
+                if condition and not active:
+                    alerts.add((rule["id"], reading_ids[i]))
+                active = condition
+            elif rule["type"] == "rate_of_change":
+                if last is not None and t > last[0]:
+                    rate = (v - last[1]) / (t - last[0])
+                    if OPERATORS[rule["op"]](rate * rule["per"], rule["value"]):
+                        alerts.add((rule["id"], reading_ids[i]))
+                last = (t, v)
+            elif rule["type"] == "sustained":
+                if OPERATORS[rule["op"]](v, rule["value"]):
+                    run_start = t if run_start is None else run_start
+                    satisfied = t - run_start >= rule["duration"]
+                    if satisfied and not fired:
+                        alerts.add((rule["id"], reading_ids[i]))
+                    fired = satisfied
+                else:
+                    run_start = None
+                    fired = False
+            else:
+                if len(history) >= ZSCORE_MIN_SAMPLES:
+                    std = np.std(history)
+                    if std > 0 and abs(v - np.mean(history)) / std > rule["z"]:
+                        alerts.add((rule["id"], reading_ids[i]))
+                history.append(v)
+    return alerts
+
+
+def readings(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    sensor_ids = rng.choice([1, 2, 3], n)
+    times = np.cumsum(rng.uniform(5, 60, n))
+    humidity = np.clip(50 + np.cumsum(rng.normal(0, 4, n)), 0, 100).round(1)
+    # Picos aislados para las reglas z-score
+    humidity[rng.random(n) < 0.03] += 30
+    pressure = rng.normal(1010, 3, n).round(1)
+    pressure[rng.random(n) < 0.03] += 12
+    humidity[rng.random(n) < 0.05] = np.nan
+    pressure[rng.random(n) < 0.05] = np.nan
+    columns = {"temperature": np.full(n, np.nan), "humidity": humidity, "pressure": pressure}
+    return sensor_ids, times, columns, np.arange(1000, 1000 + n)
+
+
+def run_in_batches(engine, data, cuts):
+    sensor_ids, times, columns, reading_ids = data
+    alerts = []
+    for start, end in zip([0, *cuts], [*cuts, len(times)]):
+        batch = slice(start, end)
+        alerts.extend(engine.evaluate(
+            sensor_ids[batch],
+            times[batch],
+            {metric: values[batch] for metric, values in columns.items()},
+            reading_ids[batch]
+        ))
+    return alerts
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("split", ["un_lote", "de_a_uno", "aleatorio"])
+def test_batches_match_reference(seed, split):
+    data = readings(seed=seed)
+    n = len(data[1])
+    if split == "un_lote":
+        cuts = []
+    elif split == "de_a_uno":
+        cuts = list(range(1, n))
+    else:
+        rng = np.random.default_rng(seed + 100)
+        cuts = sorted(set(rng.integers(1, n, 40).tolist()))
+
+    alerts = run_in_batches(AlertEngine(RULES), data, cuts)
+
+    fired = [(alert["rule_id"], alert["reading_id"]) for alert in alerts]
+    assert len(fired) == len(set(fired))
+    expected = reference_alerts(RULES, *data)
+    assert set(fired) == expected
+    # Todas las reglas se ejercitan con estos datos
+    assert {rule_id for rule_id, _ in expected} == {rule["id"] for rule in RULES}
+
+
+def evaluate_series(engine, times, values, first_id=1):
+    alerts = engine.evaluate(
+        np.ones(len(values), dtype=int),
+        np.asarray(times, dtype=float),
+        {"humidity": np.asarray(values, dtype=float)},
+        np.arange(first_id, first_id + len(values))
+    )
+    return [alert["reading_id"] for alert in alerts]
+
+
+def test_threshold_fires_on_crossing_across_batches():
+    engine = AlertEngine([RULES[0]])
+    assert evaluate_series(engine, [0, 10, 20], [50, 65, 70], first_id=1) == [2]
+    # Sigue por encima del umbral: no se repite
+    assert evaluate_series(engine, [30, 40], [75, 61], first_id=4) == []
+    # Baja y vuelve a cruzar
+    assert evaluate_series(engine, [50], [55], first_id=6) == []
+    assert evaluate_series(engine, [60, 70], [62, 64], first_id=7) == [7]
+
+
+def test_rate_of_change_uses_previous_batch():
+    engine = AlertEngine([RULES[2]])
+    assert evaluate_series(engine, [0], [40], first_id=1) == []
+    # +30 en 60 s contra la última lectura del lote anterior
+    assert evaluate_series(engine, [60], [70], first_id=2) == [2]
+
+
+def test_sustained_run_spans_batches():
+    engine = AlertEngine([RULES[4]])
+    assert evaluate_series(engine, [0, 60], [60, 60], first_id=1) == []
+    assert evaluate_series(engine, [120, 180], [60, 60], first_id=3) == [3]
+    # Una lectura por debajo reinicia la racha
+    assert evaluate_series(engine, [240, 300, 360], [50, 60, 60], first_id=5) == []
+    assert evaluate_series(engine, [420], [60], first_id=8) == [8]
+
+
+def test_zscore_accumulates_across_batches():
+    rng = np.random.default_rng(3)
+    history = rng.normal(50, 2, ZSCORE_MIN_SAMPLES)
+    engine = AlertEngine([RULES[6]])
+    for i, value in enumerate(history):
+        assert evaluate_series(engine, [i], [value], first_id=i + 1) == []
+    # El atípico se mide contra la media y desviación de los lotes previos
+    spike = history.mean() + 5 * history.std()
+    assert evaluate_series(engine, [100], [spike], first_id=100) == [100]
@@ -0,0 +1,243 @@
+#fastapi/tests/test_resilience.py
+"""
+Circuit breaker y DatabaseConnection.cursor sobre un pool falso: qué
+errores cuentan como fallo del nodo, cuáles solo liberan la prueba de
+half_open y que la conexión siempre vuelve al pool.
+"""
+import time
+
+import pytest
+from mysql.connector import errors
+
+from app.core.config import settings
+from app.core.exceptions import DatabaseConnectionError, DatabaseUnavailableError, SensorDataNotFoundError
+from app.database import connection, resilience
+from app.database.connection import INTERACTIVE, DatabaseConnection, DatabaseNode
+from app.database.resilience import CircuitBreaker
+
+POOL_SIZE = connection.QUERY_CLASSES[INTERACTIVE]["pool_size"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def cursor(self, dictionary=True):
+        return FakeCursor()
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, error=None):
+        self.error = error
+        self.connections = []
+
+    def get_connection(self):
+        if self.error is not None:
+            raise self.error
+        conn = FakeConnection()
+        self.connections.append(conn)
+        return conn
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def node(monkeypatch, clock):
+    node = DatabaseNode("prueba", "localhost", 3306)
+    node._pools[INTERACTIVE] = FakePool()
+    monkeypatch.setattr(DatabaseConnection, "primary", node)
+    monkeypatch.setattr(DatabaseConnection, "replicas", [])
+    return node
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def fail_with(error):
+    with pytest.raises(Exception) as raised:
+        with DatabaseConnection.cursor():
+            raise error
+    return raised.value
+
+
+# --- CircuitBreaker ---
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("b", failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 31
+
+
+def test_breaker_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("b", failure_threshold=3)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_a_single_probe_through(clock):
+    breaker = CircuitBreaker("b", failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.advance(30)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker("b", failure_threshold=3, reset_timeout=30)
+    open_breaker(breaker)
+    clock.advance(30)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    clock.advance(29)
+    assert not breaker.allow_request()
+
+
+def test_release_frees_the_probe_without_closing(clock):
+    breaker = CircuitBreaker("b", failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.advance(30)
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+
+# --- DatabaseConnection.cursor ---
+
+@pytest.mark.parametrize("error", [
+    errors.OperationalError(errno=2013, msg="Lost connection"),
+    errors.InterfaceError(errno=2006, msg="Gone away"),
+    *[error(errno=3024) for error in connection.CLIENT_TIMEOUT_ERRORS],
+], ids=lambda error: type(error).__name__)
+def test_connectivity_errors_open_the_circuit(node, error):
+    for _ in range(settings.DB_BREAKER_FAILURES):
+        assert isinstance(fail_with(error), DatabaseConnectionError)
+    assert node.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(DatabaseUnavailableError) as raised:
+        with DatabaseConnection.cursor():
+            pass
+    assert raised.value.retry_after >= 1
+
+
+def test_query_timeout_does_not_open_the_circuit(node):
+    for _ in range(settings.DB_BREAKER_FAILURES * 2):
+        error = fail_with(errors.DatabaseError(errno=connection.QUERY_TIMEOUT_ERRNO, msg="timeout"))
+        assert isinstance(error, DatabaseConnectionError)
+    assert node.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_query_timeout_releases_the_half_open_probe(node, clock):
+    open_breaker(node.breaker)
+    clock.advance(settings.DB_BREAKER_RESET_TIMEOUT)
+    fail_with(errors.DatabaseError(errno=connection.QUERY_TIMEOUT_ERRNO, msg="timeout"))
+    assert node.breaker.state == CircuitBreaker.HALF_OPEN
+    # La siguiente solicitud puede ser la prueba y cerrar el circuito
+    with DatabaseConnection.cursor():
+        pass
+    assert node.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_other_database_errors_propagate_and_release(node, clock):
+    open_breaker(node.breaker)
+    clock.advance(settings.DB_BREAKER_RESET_TIMEOUT)
+    error = errors.ProgrammingError(errno=1146, msg="Table doesn't exist")
+    assert fail_with(error) is error
+    assert node.breaker.state == CircuitBreaker.HALF_OPEN
+    assert node.breaker.allow_request()
+
+
+def test_application_errors_count_as_success(node, clock):
+    open_breaker(node.breaker)
+    clock.advance(settings.DB_BREAKER_RESET_TIMEOUT)
+    assert isinstance(fail_with(SensorDataNotFoundError()), SensorDataNotFoundError)
+    assert node.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_exhausted_pool_does_not_count_as_failure(node):
+    node._pools[INTERACTIVE] = FakePool(error=errors.PoolError("Failed getting connection; pool exhausted"))
+    for _ in range(settings.DB_BREAKER_FAILURES * 2):
+        with pytest.raises(DatabaseConnectionError):
+            with DatabaseConnection.cursor():
+                pass
+    assert node.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_connection_failure_counts_as_failure(node):
+    node._pools[INTERACTIVE] = FakePool(error=errors.InterfaceError("Can't connect"))
+    for _ in range(settings.DB_BREAKER_FAILURES):
+        with pytest.raises(DatabaseConnectionError):
+            with DatabaseConnection.cursor():
+                pass
+    assert node.breaker.state == CircuitBreaker.OPEN
+
+
+def test_connection_always_returns_to_the_pool(node):
+    pool = node._pools[INTERACTIVE]
+    slots = node._slots[INTERACTIVE]
+    with DatabaseConnection.cursor():
+        pass
+    fail_with(errors.OperationalError(errno=2013, msg="Lost connection"))
+    fail_with(ValueError("error del llamador"))
+    assert len(pool.connections) == 3
+    assert all(conn.closed for conn in pool.connections)
+    assert slots._value == POOL_SIZE
+
+
+def test_waits_for_a_free_connection_then_gives_up(node, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_WAIT_TIMEOUT", 0.05)
+    held = [node.acquire(INTERACTIVE) for _ in range(POOL_SIZE)]
+    started = time.monotonic()
+    with pytest.raises(DatabaseConnectionError):
+        node.acquire(INTERACTIVE)
+    assert time.monotonic() - started >= 0.05
+    assert node.breaker.state == CircuitBreaker.CLOSED
+
+    held.pop().close()
+    node.acquire(INTERACTIVE).close()
+    for conn in held:
+        conn.close()
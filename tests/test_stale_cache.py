@@ -0,0 +1,118 @@
+#fastapi/tests/test_stale_cache.py
+"""
+Caché del último resultado correcto (StaleCache) y serve_stale_on_failure:
+solo se sirve un resultado anterior ante DatabaseConnectionError, marcado
+como stale y mientras no supere max_age.
+"""
+import time
+
+import pytest
+
+from app.core.exceptions import DatabaseConnectionError, SensorDataNotFoundError
+from app.utils import stale_cache as stale_module
+from app.utils.stale_cache import StaleCache, is_stale, serve_stale_on_failure
+
+
+class FakeClock:
+    gmtime = staticmethod(time.gmtime)
+    strftime = staticmethod(time.strftime)
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(stale_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(monkeypatch, clock):
+    cache = StaleCache(max_age=60, max_entries=2)
+    monkeypatch.setattr(stale_module, "stale_cache", cache)
+    return cache
+
+
+def flaky(results):
+    """Función decorada que devuelve o lanza, en orden, los elementos de `results`"""
+    results = iter(results)
+
+    @serve_stale_on_failure("prueba")
+    def compute(days=7):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return compute
+
+
+def test_entries_expire_after_max_age(cache, clock):
+    cache.store("a", {"v": 1})
+    clock.advance(60)
+    assert cache.get("a") == ({"v": 1}, clock.now - 60)
+    clock.advance(1)
+    assert cache.get("a") is None
+
+
+def test_least_recently_stored_entry_is_evicted(cache):
+    cache.store("a", 1)
+    cache.store("b", 2)
+    cache.store("a", 3)
+    cache.store("c", 4)
+    assert cache.get("b") is None
+    assert cache.get("a")[0] == 3
+    assert cache.get("c")[0] == 4
+
+
+def test_serves_previous_result_on_database_failure(cache, clock):
+    compute = flaky([{"media": 1.5}, DatabaseConnectionError("caída")])
+    fresh = compute(days=7)
+    assert not is_stale(fresh)
+    clock.advance(12.34)
+
+    result = compute(days=7)
+    assert is_stale(result)
+    assert result["media"] == 1.5
+    assert result["stale_age_seconds"] == 12.3
+    assert result["computed_at"] == time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(clock.now - 12.34))
+    # El resultado guardado no queda marcado
+    assert not is_stale(cache.get(("prueba", "()", repr([("days", 7)])))[0])
+
+
+def test_failure_without_previous_result_propagates(cache):
+    compute = flaky([{"media": 1.5}, DatabaseConnectionError("caída")])
+    compute(days=7)
+    # Otros argumentos, otra entrada
+    with pytest.raises(DatabaseConnectionError):
+        compute(days=30)
+
+
+def test_expired_result_is_not_served(cache, clock):
+    compute = flaky([{"media": 1.5}, DatabaseConnectionError("caída")])
+    compute()
+    clock.advance(61)
+    with pytest.raises(DatabaseConnectionError):
+        compute()
+
+
+def test_other_errors_are_not_masked(cache):
+    compute = flaky([{"media": 1.5}, SensorDataNotFoundError()])
+    compute()
+    with pytest.raises(SensorDataNotFoundError):
+        compute()
+
+
+def test_non_dict_results_are_not_served_stale(cache):
+    compute = flaky([[1, 2, 3], DatabaseConnectionError("caída")])
+    compute()
+    with pytest.raises(DatabaseConnectionError):
+        compute()
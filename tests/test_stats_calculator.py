@@ -0,0 +1,152 @@
+#fastapi/tests/test_stats_calculator.py
+"""
+Paridad del kernel fusionado (summarize / calculate_group_stats) con las
+implementaciones anteriores de calculate_stats (numpy + scipy) y
+ProbabilityAnalyzer.calculate_advanced_stats (pandas), reproducidas aquí.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from app.utils.probability_calculator import ProbabilityAnalyzer
+from app.utils.stats_calculator import calculate_group_stats, calculate_stats, summarize
+
+
+def legacy_calculate_stats(values):
+    result = {
+        "Media": float(np.mean(values)),
+        "Mediana": float(np.median(values)),
+        "Mínimo": float(np.min(values)),
+        "Máximo": float(np.max(values)),
+        "Rango": float(np.ptp(values)),
+        "Desviación Estándar": float(np.std(values)),
+        "Cantidad de muestras": len(values)
+    }
+    unique_values, counts = np.unique(values, return_counts=True)
+    modes = unique_values[counts == np.max(counts)]
+    if len(modes) == 1:
+        result["Moda"] = float(modes[0])
+    else:
+        result["Moda"] = f"Múltiples modas: {', '.join(map(str, modes))}"
+    result["Sesgo"] = float(stats.skew(values))
+    return result
+
+
+def legacy_advanced_stats(data):
+    series = pd.Series(data)
+    result = {
+        "mean": float(series.mean()),
+        "median": float(series.median()),
+        "mode": [float(x) for x in series.mode().tolist()],
+        "skew": float(series.skew()),
+        "kurtosis": float(series.kurtosis()),
+        "min": float(series.min()),
+        "max": float(series.max()),
+        "std": float(series.std()),
+        "percentiles": {
+            "25": float(series.quantile(0.25)),
+            "50": float(series.quantile(0.5)),
+            "75": float(series.quantile(0.75))
+        }
+    }
+    freq, bins = np.histogram(data, bins=10)
+    result["relative_frequency"] = {"bins": bins.tolist(), "counts": (freq / len(data)).tolist()}
+    return result
+
+
+def assert_same(actual, expected, path="resultado"):
+    """Igualdad con tolerancia numérica; None en el kernel equivale a NaN/inf en la referencia"""
+    if isinstance(expected, dict):
+        assert set(actual) == set(expected), path
+        for key in expected:
+            assert_same(actual[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected), path
+        for i, (a, e) in enumerate(zip(actual, expected)):
+            assert_same(a, e, f"{path}[{i}]")
+    elif isinstance(expected, float) and not math.isfinite(expected):
+        assert actual is None, path
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-9, abs=1e-9), path
+    else:
+        assert actual == expected, path
+
+
+def sample_inputs():
+    rng = np.random.default_rng(0)
+    cases = {
+        # Lecturas con un decimal, como las del sensor: muchos empates
+        "presion": rng.normal(1013, 5, 500).round(1),
+        "humedad": rng.uniform(20, 100, 50).round(1),
+        # Pocos valores distintos: varias modas
+        "enteros": rng.integers(0, 5, 200).astype(float),
+        # Valores justo sobre los bordes del histograma
+        "bordes": np.linspace(0, 1, 11),
+        "bordes_repetidos": np.repeat(np.linspace(-3, 7, 21), 3),
+        "constante": np.full(7, 42.5),
+        # Lecturas con un decimal sobre bordes del histograma donde el índice
+        # calculado en coma flotante cae en el bin equivocado sin corrección
+        "bordes_presion": np.r_[789.1, 794.5, np.linspace(789.1, 794.5, 11).round(1)],
+        "bordes_amplios": np.r_[721.2, 740.7, np.linspace(721.2, 740.7, 11).round(1)],
+        "bordes_negativos": np.r_[-3.4, 18.6, np.linspace(-3.4, 18.6, 11).round(1)],
+        "negativos": -rng.exponential(10, 300),
+    }
+    for n in (1, 2, 3, 4, 5):
+        cases[f"n{n}"] = rng.normal(0, 1, n).round(2)
+    for i in range(20):
+        n = int(rng.integers(1, 400))
+        cases[f"aleatorio{i}"] = rng.normal(rng.uniform(-100, 100), rng.uniform(0.1, 50), n).round(int(rng.integers(0, 3)))
+    return cases
+
+
+CASES = sample_inputs()
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_summarize_matches_legacy(name):
+    values = CASES[name].tolist()
+    summary = summarize(values)
+    assert_same(summary["basic_stats"], legacy_calculate_stats(values))
+    assert_same(summary["advanced_stats"], legacy_advanced_stats(values))
+    assert calculate_stats(values) == summary["basic_stats"]
+
+
+def test_summarize_ignores_nan():
+    values = [1.0, np.nan, 2.0, 2.0, np.nan, 5.0]
+    assert summarize(values) == summarize([1.0, 2.0, 2.0, 5.0])
+
+
+def test_summarize_rejects_empty():
+    with pytest.raises(ValueError):
+        summarize([])
+
+
+def test_advanced_stats_empty():
+    assert ProbabilityAnalyzer.calculate_advanced_stats([]) == {}
+    assert ProbabilityAnalyzer.calculate_advanced_stats(np.array([])) == {}
+
+
+def test_group_stats_matches_per_group_summarize():
+    rng = np.random.default_rng(1)
+    groups = rng.integers(1, 30, 5000)
+    values = rng.normal(50, 10, 5000).round(1)
+    # Grupos de un solo valor, constantes y con NaN
+    groups = np.r_[groups, 100, 101, 101, 101, 102, 102]
+    values = np.r_[values, 3.0, 7.0, 7.0, 7.0, np.nan, 1.5]
+    values[rng.random(len(values)) < 0.05] = np.nan
+
+    grouped = calculate_group_stats(groups, values)
+
+    expected_groups = sorted(set(groups[~np.isnan(values)].tolist()))
+    assert list(grouped) == expected_groups
+    for group in expected_groups:
+        members = values[(groups == group) & ~np.isnan(values)]
+        assert_same(grouped[group], summarize(members), f"grupo {group}")
+
+
+def test_group_stats_empty():
+    assert calculate_group_stats([1, 2], [np.nan, np.nan]) == {}